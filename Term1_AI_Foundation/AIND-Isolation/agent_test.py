@@ -3,12 +3,29 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import asyncio
+import inspect
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import tempfile
 import unittest
 
 import isolation
 import game_agent
+import game_scheduler
+import learned_eval
+import match_server
+import perft
+import result_cache
+import tablebase
+import tournament
 
 from importlib import reload
+from sample_players import GreedyPlayer, RandomPlayer, improved_score
+from search_profiler import SearchProfiler
 
 
 class IsolationTest(unittest.TestCase):
@@ -21,5 +38,773 @@ class IsolationTest(unittest.TestCase):
         self.game = isolation.Board(self.player1, self.player2)
 
 
+class TerritoryScoreTest(unittest.TestCase):
+    """Unit tests for the territory heuristic"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+        self.game = isolation.Board(self.player1, self.player2)
+
+    def test_opening_position(self):
+        # the second player is not placed yet after the first move
+        self.game.apply_move((2, 3))
+        score = game_agent.territory_score(self.game, self.player1)
+        self.assertEqual(score, -game_agent.territory_score(self.game, self.player2))
+        self.assertEqual(game_agent.territory_score(isolation.Board(
+            self.player1, self.player2), self.player1), 0.)
+
+    def test_symmetric(self):
+        self.game.apply_move((2, 3))
+        self.game.apply_move((0, 0))
+        score = game_agent.territory_score(self.game, self.player1)
+        self.assertEqual(score, -game_agent.territory_score(self.game, self.player2))
+        self.assertGreater(score, 0)
+
+
+class LearnedEvalTest(unittest.TestCase):
+    """Unit tests for the learned linear evaluator"""
+
+    def setUp(self):
+        self.player1 = game_agent.AlphaBetaPlayer()
+        self.player2 = "Player2"
+        self.game = isolation.Board(self.player1, self.player2)
+
+    def test_empty_board_features(self):
+        features = learned_eval.extract_features(self.game, self.player1)
+        self.assertEqual(len(features), learned_eval.NUM_FEATURES)
+        names = learned_eval.FEATURE_NAMES
+        for name in ("own_territory", "opp_territory", "partitioned", "player_distance"):
+            self.assertEqual(features[names.index(name)], 0.)
+
+    def test_batch_matches_single_scores(self):
+        evaluator = learned_eval.LinearEvaluator()
+        self.game.apply_move((3, 3))
+        children = [self.game.forecast_move(m) for m in self.game.get_legal_moves()]
+        self.assertEqual(evaluator.score_batch(children, self.player1),
+                         [evaluator(child, self.player1) for child in children])
+
+    def test_batched_search(self):
+        # batched leaf scoring gives the same values as one call per leaf
+        evaluator = learned_eval.LinearEvaluator()
+        self.player1.time_left = lambda: 1e9
+        for _ in range(4):
+            self.game.apply_move(self.game.get_legal_moves()[0])
+        values = []
+        for score_fn in (evaluator, lambda game, player: evaluator(game, player)):
+            self.player1.score = score_fn
+            values.append(self.player1.max_value(self.game, 2, float("-inf"), float("inf")))
+        self.assertEqual(values[0], values[1])
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Unit tests for the tournament result cache and game seeds"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = result_cache.ResultCache(os.path.join(self.tmp.name, "results.db"))
+        self.agent_1 = tournament.Agent(RandomPlayer(), "Random")
+        self.agent_2 = tournament.Agent(GreedyPlayer(), "Greedy")
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_derived_seeds(self):
+        derive_seed = tournament.derive_seed
+        self.assertEqual(derive_seed(1, "A", "B", 0), derive_seed(1, "A", "B", 0))
+        self.assertNotEqual(derive_seed(1, "A", "B", 0), derive_seed(1, "B", "A", 0))
+        self.assertNotEqual(derive_seed(1, "A", "B", 0), derive_seed(1, "A", "B", 1))
+        self.assertIsNone(derive_seed(None, "A", "B", 0))
+
+    def test_seeds_key_on_fingerprints(self):
+        # agents that share a name but not their code get different games
+        namesake = tournament.Agent(GreedyPlayer(), "Random")
+        _, seed_1 = tournament.new_game(self.agent_1, self.agent_2, 0, 7)
+        _, seed_2 = tournament.new_game(namesake, self.agent_2, 0, 7)
+        self.assertNotEqual(seed_1, seed_2)
+        # agents with the same code and settings are interchangeable
+        twin = tournament.Agent(RandomPlayer(), "Random_2")
+        _, seed_3 = tournament.new_game(twin, self.agent_2, 0, 7)
+        self.assertEqual(seed_1, seed_3)
+
+    def test_unchanged_pairing_is_cached(self):
+        tournament.play_fair_pair(self.agent_1, self.agent_2, 0, 7, self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+        # another pairing played in between does not change the seeds
+        tournament.play_fair_pair(self.agent_2, self.agent_1, 0, 7, self.cache)
+        tournament.play_fair_pair(self.agent_1, self.agent_2, 0, 7, self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 4))
+
+    def test_games_are_independent(self):
+        # a seeded game is replayed identically whatever else draws random
+        # numbers before it (e.g., other games that the cache skips)
+        def history(match):
+            game, _ = tournament.new_game(self.agent_1, tournament.Agent(RandomPlayer(), "R"),
+                                          match, 7)
+            return game.play()[1]
+        expected = history(1)
+        random.random()
+        history(0)
+        self.assertEqual(history(1), expected)
+
+    def test_changed_fingerprint_misses(self):
+        game, seed = tournament.new_game(self.agent_1, self.agent_2, 0, 7)
+        self.cache.store(game, 100, seed, game._player_1, "forfeit")
+        self.assertEqual(self.cache.lookup(game, 100, seed), (game._player_1, "forfeit"))
+        player = game_agent.AlphaBetaPlayer()
+        before = result_cache.fingerprint(player)
+        player.search_depth += 1
+        self.assertNotEqual(result_cache.fingerprint(player), before)
+        game._player_1 = player
+        self.assertIsNone(self.cache.lookup(game, 100, seed))
+
+    def test_fingerprint_covers_used_code(self):
+        sources = result_cache._dependency_sources(game_agent.custom_score)
+        self.assertIn(inspect.getsource(game_agent.center_distance), sources)
+        self.assertNotIn(inspect.getsource(game_agent.custom_score_3), sources)
+        sources = result_cache._dependency_sources(game_agent.AlphaBetaPlayer)
+        self.assertIn(inspect.getsource(game_agent.IsolationPlayer), sources)
+        self.assertNotIn(inspect.getsource(game_agent.custom_score), sources)
+
+
+class TablebaseTest(unittest.TestCase):
+    """Unit tests for the endgame tablebase"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, "tb_4x4.bin")
+        layout, table = tablebase.generate(4, 4, 4)
+        tablebase.save(cls.path, layout, table)
+        cls.tablebase = tablebase.Tablebase(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.tmp.cleanup()
+
+    def solve(self, game):
+        """Return True if the player to move wins, by brute force minimax."""
+        return any(not self.solve(game.forecast_move(move))
+                   for move in game.get_legal_moves())
+
+    def endgame(self, rng, player_1="Player1", player_2="Player2"):
+        """Play random moves on a 4x4 board until 4 cells are empty, and
+        return the board, or None if the game ended before."""
+        game = isolation.Board(player_1, player_2, 4, 4)
+        while game.width * game.height - game.move_count > 4:
+            moves = game.get_legal_moves()
+            if not moves:
+                return None
+            game.apply_move(rng.choice(moves))
+        return game
+
+    def test_probe_matches_minimax(self):
+        rng = random.Random(0)
+        probed = 0
+        while probed < 200:
+            game = self.endgame(rng)
+            if game is None:
+                continue
+            self.assertTrue(self.tablebase.covers(game))
+            wins, plies = self.tablebase.probe(game)
+            self.assertEqual(wins, self.solve(game))
+            self.assertEqual(plies == 0, not game.get_legal_moves())
+            probed += 1
+
+    def test_covers(self):
+        game = isolation.Board("Player1", "Player2", 4, 4)
+        self.assertFalse(self.tablebase.covers(game))
+        self.assertIsNone(self.tablebase.probe(game))
+        self.assertFalse(self.tablebase.covers(isolation.Board("Player1", "Player2")))
+
+    def test_player_probe(self):
+        player = game_agent.AlphaBetaPlayer()
+        player.tablebase = self.tablebase
+        rng = random.Random(1)
+        game = None
+        while game is None:
+            game = self.endgame(rng, player)
+        value = player.probe_tablebase(game)
+        wins = self.solve(game) == (game.active_player == player)
+        self.assertEqual(value, float("inf") if wins else float("-inf"))
+
+
+class PerftTest(unittest.TestCase):
+    """Unit tests for the perft node counter"""
+
+    def count(self, width, height, blocked, locations, depth):
+        """Independent perft over (blocked cells, player locations)."""
+        if depth == 0:
+            return 1
+        loc = locations[0]
+        if loc is None:
+            moves = [(r, c) for r in range(height) for c in range(width)
+                     if (r, c) not in blocked]
+        else:
+            moves = [(loc[0] + dr, loc[1] + dc) for dr, dc in game_agent.DIRECTIONS
+                     if 0 <= loc[0] + dr < height and 0 <= loc[1] + dc < width and
+                     (loc[0] + dr, loc[1] + dc) not in blocked]
+        return sum(self.count(width, height, blocked | {m}, (locations[1], m), depth - 1)
+                   for m in moves)
+
+    def test_empty_board(self):
+        board = perft.new_board(isolation.Board, 7, 7)
+        self.assertEqual([perft.perft(board, d) for d in (1, 2, 3)], [49, 2352, 11280])
+
+    def test_matches_independent_count(self):
+        board = perft.new_board(isolation.Board, 5, 5, [(2, 2), (0, 0)])
+        expected = self.count(5, 5, {(2, 2), (0, 0)}, ((2, 2), (0, 0)), 4)
+        self.assertEqual(perft.perft(board, 4), expected)
+        self.assertEqual(perft.perft(board, 4, bulk=False), expected)
+        self.assertEqual(sum(n for _, n in perft.divide(board, 4)), expected)
+
+
+class ForfeitPlayer:
+    """Player that always returns an illegal move, and so loses every game."""
+
+    def get_move(self, game, time_left):
+        return (-1, -1)
+
+
+class SprtTest(unittest.TestCase):
+    """Unit tests for the SPRT tournament mode and the Elo ratings"""
+
+    def test_elo(self):
+        self.assertAlmostEqual(tournament.elo_win_probability(0), 0.5)
+        self.assertAlmostEqual(tournament.elo_win_probability(400), 10. / 11)
+        ratings = {"a": 0., "b": 0.}
+        tournament.update_elo(ratings, "a", "b", k=16)
+        self.assertEqual(ratings, {"a": 8., "b": -8.})
+
+    def test_bayes_elo(self):
+        # with one virtual win each way, 3-1 becomes 4-2: a rating gap of
+        # 400 * log10(2)
+        ratings = tournament.bayes_elo({("a", "b"): 3, ("b", "a"): 1}, ["a", "b"])
+        self.assertAlmostEqual(ratings["a"] - ratings["b"], 400 * math.log10(2))
+        self.assertAlmostEqual(ratings["a"] + ratings["b"], 0.)
+
+    def test_sprt_llr(self):
+        lower, upper = tournament.sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(upper, -lower)
+        self.assertAlmostEqual(tournament.sprt_llr(10, 10, -100, 100), 0.)
+        self.assertGreater(tournament.sprt_llr(20, 0, -100, 100), upper)
+        self.assertLess(tournament.sprt_llr(0, 20, -100, 100), lower)
+
+    def test_sprt_pairing_stops_early(self):
+        test_agent = tournament.Agent(RandomPlayer(), "Random")
+        cpu_agent = tournament.Agent(ForfeitPlayer(), "Forfeit")
+        ratings = {test_agent: 0., cpu_agent: 0.}
+        results = {}
+        won, lost, decision, _, _, _ = tournament.play_sprt_pairing(
+            cpu_agent, test_agent, ratings, results, 100, seed=1)
+        self.assertEqual(decision, "H1")
+        self.assertEqual(lost, 0)
+        self.assertLess(won, 200)
+        self.assertEqual(results[(test_agent, cpu_agent)], won)
+        self.assertGreater(ratings[test_agent], ratings[cpu_agent])
+
+
+class ScriptedPlayer(game_agent.AlphaBetaPlayer):
+    """Player whose min_value() returns a scripted value for each (location
+    of the player, depth) pair, 0 by default, and records its calls."""
+
+    def __init__(self, values):
+        super().__init__()
+        self.values = values
+        self.calls = []
+        self.time_left = lambda: float("inf")
+
+    def min_value(self, game, depth, alpha, beta, extensions=0):
+        key = (game.get_player_location(self), depth)
+        self.calls.append(key)
+        return self.values.get(key, 0)
+
+
+class SelectiveSearchTest(unittest.TestCase):
+    """Unit tests for the horizon extensions and late move reductions"""
+
+    def setUp(self):
+        self.score = improved_score
+        self.player = game_agent.AlphaBetaPlayer(score_fn=improved_score)
+        self.player.time_left = lambda: float("inf")
+
+    def positions(self, count, seed=0):
+        """Random 5x5 positions with the player to move."""
+        rng = random.Random(seed)
+        while count:
+            game = isolation.Board(self.player, "Player2", 5, 5)
+            for _ in range(rng.choice([2, 4, 6, 8])):
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(rng.choice(moves))
+            if game.get_legal_moves() and game.active_player == self.player:
+                count -= 1
+                yield game
+
+    def minimax(self, game, depth):
+        moves = game.get_legal_moves()
+        if not moves or depth == 0:
+            return self.score(game, self.player)
+        values = [self.minimax(game.forecast_move(m), depth - 1) for m in moves]
+        return max(values) if game.active_player == self.player else min(values)
+
+    def test_full_width_matches_minimax(self):
+        # without selective=True the search is plain depth-limited alpha-beta
+        for game in self.positions(10):
+            self.assertEqual(self.player.max_value(game, 3, float("-inf"), float("inf")),
+                             self.minimax(game, 3))
+            move = self.player.alphabeta(game, 3)
+            self.assertEqual(self.minimax(game.forecast_move(move), 2), self.minimax(game, 3))
+
+    def test_volatile_horizon_is_extended(self):
+        self.player.MAX_EXTENSIONS = 1
+        self.player._extend = True
+        found = 0
+        for game in self.positions(200, seed=1):
+            moves = game.get_legal_moves()
+            if not self.player.is_volatile(game, moves):
+                self.assertEqual(self.player.max_value(game, 0, float("-inf"), float("inf")),
+                                 self.score(game, self.player))
+                continue
+            found += 1
+            self.assertEqual(self.player.max_value(game, 0, float("-inf"), float("inf")),
+                             self.minimax(game, 1))
+        self.assertGreater(found, 0)
+
+    def test_order_moves(self):
+        for game in self.positions(10, seed=2):
+            ordered = self.player.order_moves(game, game.get_legal_moves())
+            self.assertEqual(sorted(ordered), sorted(game.get_legal_moves()))
+            mobility = [len(game.forecast_move(m).get_legal_moves(self.player))
+                        for m in ordered]
+            self.assertEqual(mobility, sorted(mobility, reverse=True))
+
+    def test_reduced_search_returns_legal_move(self):
+        for game in self.positions(5, seed=3):
+            self.assertIn(self.player.alphabeta(game, 5, selective=True),
+                          game.get_legal_moves())
+
+    def scripted_game(self, player):
+        game = isolation.Board(player, "Player2", shuffle_moves=False)
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        return game
+
+    def test_reduced_move_is_re_searched(self):
+        game = self.scripted_game(self.player)
+        moves = self.player.order_moves(game, game.get_legal_moves())
+        # the fourth move looks best at the reduced depth but only scores 5
+        # at full depth, and the fifth scores 7 at full depth only
+        values = {(moves[3], 1): 10, (moves[3], 2): 5, (moves[4], 2): 7}
+        player = ScriptedPlayer(values)
+        player._reduce = True
+        self.assertEqual(player.max_value(self.scripted_game(player), 3,
+                                          float("-inf"), float("inf")), 5)
+        self.assertEqual(player.calls[:5], [(moves[0], 2), (moves[1], 2), (moves[2], 2),
+                                            (moves[3], 1), (moves[3], 2)])
+        self.assertNotIn((moves[4], 2), player.calls)
+        # without reductions every move is searched to full depth
+        player = ScriptedPlayer(values)
+        game = self.scripted_game(player)
+        self.assertEqual(player.max_value(game, 3, float("-inf"), float("inf")), 7)
+        self.assertEqual(player.calls, [(move, 2) for move in game.get_legal_moves()])
+
+
+class LegalMovesTest(unittest.TestCase):
+    """Unit tests for the memoized legal move generation"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+        self.game = isolation.Board(self.player1, self.player2)
+
+    def expected_moves(self, game, player):
+        blanks = set(game.get_blank_spaces())
+        loc = game.get_player_location(player)
+        if loc is None:
+            return sorted(blanks)
+        return sorted((loc[0] + dr, loc[1] + dc) for dr, dc in game_agent.DIRECTIONS
+                      if (loc[0] + dr, loc[1] + dc) in blanks)
+
+    def test_moves_follow_the_game(self):
+        rng = random.Random(0)
+        while True:
+            for player in (self.player1, self.player2):
+                # query twice so the second answer comes from the cache
+                self.game.get_legal_moves(player)
+                self.assertEqual(sorted(self.game.get_legal_moves(player)),
+                                 self.expected_moves(self.game, player))
+            moves = self.game.get_legal_moves()
+            if not moves:
+                break
+            self.game.apply_move(rng.choice(moves))
+
+    def test_returned_list_is_a_copy(self):
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+        moves = self.game.get_legal_moves()
+        moves.clear()
+        self.assertEqual(len(self.game.get_legal_moves()), 8)
+
+    def test_copy_is_independent(self):
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+        before = self.game.get_legal_moves()
+        child = self.game.copy()
+        child.apply_move(before[0])
+        self.assertEqual(self.game.get_legal_moves(), before)
+        self.assertEqual(sorted(child.get_legal_moves()),
+                         self.expected_moves(child, child.active_player))
+
+
+class DistanceTablesTest(unittest.TestCase):
+    """Unit tests for the distance lookup tables"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+        self.game = isolation.Board(self.player1, self.player2, 7, 5)
+        self.game.apply_move((1, 6))
+        self.game.apply_move((4, 2))
+
+    def test_center_distance(self):
+        # the center of a 7 column, 5 row board is (x, y) = (3.5, 2.5)
+        self.assertEqual(game_agent.center_distance(self.game, self.player1, 'manhattan'), 4.)
+        self.assertEqual(game_agent.center_distance(self.game, self.player1, 'chebyshev'), 2.5)
+        self.assertAlmostEqual(game_agent.center_distance(self.game, self.player2, 'minkowski'),
+                               math.hypot(1.5, 1.5))
+
+    def test_player_distance(self):
+        self.assertEqual(game_agent.player_distance(self.game, 'manhattan'), 7.)
+        self.assertEqual(game_agent.player_distance(self.game, 'chebyshev'), 4.)
+        self.assertAlmostEqual(game_agent.player_distance(self.game, 'minkowski'),
+                               math.hypot(4, 3))
+
+    def test_tables_are_shared(self):
+        self.assertIs(game_agent.distance_tables(7, 5), game_agent.distance_tables(7, 5))
+
+
+class MatchServerTest(unittest.TestCase):
+    """Unit tests for the match server protocol and worker pools"""
+
+    def test_request_round_trip(self):
+        game = isolation.Board("p1", "p2")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        game.apply_move((4, 4))
+        message = match_server.encode_request(7, 150, 1, game)
+        request_id, time_limit, player_index, size = \
+            match_server.REQUEST.unpack_from(message)
+        self.assertEqual((request_id, time_limit, player_index), (7, 150, 1))
+        self.assertEqual(size, len(message) - match_server.REQUEST.size)
+        board = isolation.Board.from_bytes(
+            message, "p1", "p2", offset=match_server.REQUEST.size)
+        self.assertEqual(board.to_bytes(), game.to_bytes())
+        self.assertEqual(set(board.get_legal_moves()), set(game.get_legal_moves()))
+
+    def test_load_agent(self):
+        self.assertIsInstance(match_server.load_agent("Random"), RandomPlayer)
+        self.assertIsInstance(
+            match_server.load_agent("agent_test:ForfeitPlayer"), ForfeitPlayer)
+
+    def test_play_matches(self):
+        # each match is a fair pair of games, both won by the legal player
+        loop = asyncio.new_event_loop()
+        try:
+            wins, terminations = loop.run_until_complete(match_server.play_matches(
+                "Random", "agent_test:ForfeitPlayer", 2, 150, 1, 2))
+        finally:
+            loop.close()
+        self.assertEqual(wins, [4, 0])
+        self.assertEqual(terminations, {"forfeit": 4})
+
+
+class BoardEncodingTest(unittest.TestCase):
+    """Unit tests for the binary encoding of the game state"""
+
+    def assertSameBoard(self, board, game):
+        self.assertEqual((board.width, board.height, board.move_count),
+                         (game.width, game.height, game.move_count))
+        self.assertEqual(board.active_player, game.active_player)
+        for player in ("p1", "p2"):
+            self.assertEqual(board.get_player_location(player),
+                             game.get_player_location(player))
+        self.assertEqual(board.get_blocked_mask(), game.get_blocked_mask())
+        self.assertEqual(sorted(board.get_blank_spaces()), sorted(game.get_blank_spaces()))
+        self.assertEqual(sorted(board.get_legal_moves()), sorted(game.get_legal_moves()))
+        self.assertEqual(board.hash(), game.hash())
+
+    def test_round_trip(self):
+        game = isolation.Board("p1", "p2", width=5, height=6, seed=3)
+        data = game.to_bytes()
+        self.assertEqual(len(data), isolation.Board.encoded_size(5, 6))
+        self.assertSameBoard(isolation.Board.from_bytes(data, "p1", "p2"), game)
+        for _ in range(7):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(moves[0])
+            data = game.to_bytes()
+            self.assertEqual(len(data), isolation.Board.encoded_size(5, 6))
+            self.assertSameBoard(isolation.Board.from_bytes(data, "p1", "p2"), game)
+
+    def test_offset(self):
+        game = isolation.Board("p1", "p2")
+        game.apply_move((3, 3))
+        game.apply_move((0, 1))
+        message = b"header" + game.to_bytes() + b"trailer"
+        board = isolation.Board.from_bytes(memoryview(message), "p1", "p2", offset=6)
+        self.assertSameBoard(board, game)
+
+
+class SeededMovesTest(unittest.TestCase):
+    """Unit tests for seeded and fixed move ordering"""
+
+    def play_first_moves(self, game):
+        """Play the first legal move until the game ends; return the moves."""
+        history = []
+        moves = game.get_legal_moves()
+        while moves:
+            history.append(moves[0])
+            game = game.forecast_move(moves[0])
+            moves = game.get_legal_moves()
+        return history
+
+    def test_same_seed_same_order(self):
+        history = self.play_first_moves(isolation.Board("p1", "p2", seed=11))
+        self.assertEqual(self.play_first_moves(isolation.Board("p1", "p2", seed=11)), history)
+        self.assertNotEqual(self.play_first_moves(isolation.Board("p1", "p2", seed=12)), history)
+
+    def test_seed_does_not_change_moves(self):
+        game_1 = isolation.Board("p1", "p2", seed=1)
+        game_2 = isolation.Board("p1", "p2", seed=2)
+        for move in [(3, 3), (0, 0)]:
+            game_1.apply_move(move)
+            game_2.apply_move(move)
+        self.assertEqual(sorted(game_1.get_legal_moves()), sorted(game_2.get_legal_moves()))
+
+    def test_fixed_order(self):
+        game = isolation.Board("p1", "p2", shuffle_moves=False)
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        self.assertEqual(game.get_legal_moves(),
+                         [(1, 2), (1, 4), (2, 1), (2, 5), (4, 1), (4, 5), (5, 2), (5, 4)])
+
+    def test_tournament_seeds(self):
+        agent_1 = tournament.Agent("p1", "A")
+        agent_2 = tournament.Agent("p2", "B")
+        self.assertIsNone(tournament.derive_seed(None, "A", "B", 0))
+        self.assertEqual(tournament.derive_seed(5, "A", "B", 0),
+                         tournament.derive_seed(5, "A", "B", 0))
+        self.assertNotEqual(tournament.derive_seed(5, "A", "B", 0),
+                            tournament.derive_seed(5, "B", "A", 0))
+        game_1, seed_1 = tournament.new_game(agent_1, agent_2, 3, base_seed=5)
+        game_2, seed_2 = tournament.new_game(agent_1, agent_2, 3, base_seed=5)
+        self.assertEqual(seed_1, seed_2)
+        self.assertEqual(self.play_first_moves(game_1), self.play_first_moves(game_2))
+
+
+class KnightDistanceTest(unittest.TestCase):
+    """Unit tests for the knight-distance tables and Board distance helpers"""
+
+    def bfs_distances(self, width, height, start):
+        """Return the knight distances from start on an empty board by search."""
+        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2), (1, 2), (2, -1), (2, 1)]
+        distances = {start: 0}
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for r, c in frontier:
+                for dr, dc in directions:
+                    cell = (r + dr, c + dc)
+                    if 0 <= cell[0] < height and 0 <= cell[1] < width and cell not in distances:
+                        distances[cell] = distances[(r, c)] + 1
+                        next_frontier.append(cell)
+            frontier = next_frontier
+        return distances
+
+    def test_matches_search(self):
+        for width, height in [(7, 7), (5, 4), (3, 3)]:
+            game = isolation.Board("p1", "p2", width, height)
+            cells = [(r, c) for c in range(width) for r in range(height)]
+            for start in cells:
+                distances = self.bfs_distances(width, height, start)
+                for cell in cells:
+                    self.assertEqual(game.get_knight_distance(start, cell),
+                                     distances.get(cell, float("inf")))
+
+    def test_unreachable(self):
+        # no knight move enters or leaves the center of a 3x3 board
+        game = isolation.Board("p1", "p2", 3, 3)
+        self.assertEqual(game.get_knight_distance((1, 1), (0, 0)), float("inf"))
+        self.assertEqual(game.get_knight_distance((1, 1), None), float("inf"))
+        self.assertIs(isolation.isolation.knight_distances(3, 3),
+                      isolation.isolation.knight_distances(3, 3))
+
+    def test_players_and_region(self):
+        game = isolation.Board("p1", "p2")
+        self.assertEqual(game.get_players_distance(), float("inf"))
+        self.assertEqual(game.get_region_distance("p1", 1), float("inf"))
+        game.apply_move((0, 0))
+        game.apply_move((2, 1))
+        self.assertEqual(game.get_players_distance(), 1)
+        # the region holding (6, 6) and (3, 3); (3, 3) is two moves from (0, 0)
+        region = (1 << (6 + 6 * 7)) | (1 << (3 + 3 * 7))
+        self.assertEqual(game.get_region_distance("p1", region), 2)
+        self.assertEqual(game.get_region_distance("p1", 0), float("inf"))
+
+    def test_region_distance_matches_search(self):
+        for width, height in [(7, 7), (5, 4), (3, 3)]:
+            game = isolation.Board("p1", "p2", width, height)
+            game.apply_move((height // 2, width // 2))
+            game.apply_move((0, 0))
+            distances = self.bfs_distances(width, height, (height // 2, width // 2))
+            open_cells = game.get_blank_spaces()
+            reachable = [distances[cell] for cell in open_cells if cell in distances]
+            expected = min(reachable) if reachable else float("inf")
+            self.assertEqual(
+                game.get_region_distance("p1", ~game.get_blocked_mask()), expected)
+            for r, c in open_cells:
+                self.assertEqual(game.get_region_distance("p1", 1 << (r + c * height)),
+                                 distances.get((r, c), float("inf")))
+
+
+class SearchProfilerTest(unittest.TestCase):
+    """Unit tests for the search profiler"""
+
+    def setUp(self):
+        self.player = game_agent.AlphaBetaPlayer(search_depth=3)
+        self.player.time_left = lambda: float("inf")
+        self.game = isolation.Board(self.player, "Opponent", shuffle_moves=False)
+        for move in [(2, 3), (4, 4), (3, 5), (2, 2)]:
+            self.game.apply_move(move)
+        self.profiler = SearchProfiler()
+
+    def test_profiled_search(self):
+        expected = self.player.alphabeta(self.game.copy(), 3)
+        game = self.game.copy()
+        with self.profiler.attach(self.player):
+            self.assertIs(self.player.profiler, self.profiler)
+            self.assertEqual(self.player.alphabeta(game, 3), expected)
+        # the root searches every legal move; extensions may go deeper
+        self.assertEqual(self.profiler.nodes[0], 1)
+        self.assertEqual(self.profiler.nodes[1], len(self.game.get_legal_moves()))
+        self.assertEqual(sorted(self.profiler.nodes)[:4], [0, 1, 2, 3])
+        self.assertLessEqual(max(self.profiler.nodes), 3 + self.player.MAX_EXTENSIONS)
+        self.assertGreater(self.profiler.calls["score"], 0)
+
+    def test_detach_restores(self):
+        copy = isolation.Board.copy
+        score = self.player.score
+        with self.profiler.attach(self.player):
+            self.assertIsNot(isolation.Board.copy, copy)
+            self.assertIsNot(self.player.score, score)
+        self.assertIs(isolation.Board.copy, copy)
+        self.assertIs(self.player.score, score)
+        for name in ("alphabeta", "max_value", "min_value", "profiler"):
+            self.assertNotIn(name, self.player.__dict__)
+        self.assertIsNone(self.player.profiler)
+
+    def test_reports(self):
+        game = self.game.copy()
+        with self.profiler.attach(self.player):
+            self.player.alphabeta(game, 3)
+        lines = self.profiler.collapsed_stacks()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, micros = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith("depth 3"))
+            self.assertGreater(int(micros), 0)
+        summary = self.profiler.summary()
+        self.assertIn("Ply", summary)
+        self.assertIn("movegen", summary)
+
+
+class GameSchedulerTest(unittest.TestCase):
+    """Unit tests for the multi-game scheduler"""
+
+    def setUp(self):
+        self.random_player = RandomPlayer()
+        self.forfeit_player = ForfeitPlayer()
+
+    def test_virtual_clock(self):
+        clock = game_scheduler.VirtualClock(100)
+        self.assertEqual(clock.time_left(), 100)
+        clock.start()
+        clock.stop()
+        paused = clock.time_left()
+        self.assertLessEqual(paused, 100)
+        # the clock does not run while it is stopped
+        sum(range(10000))
+        self.assertEqual(clock.time_left(), paused)
+
+    def test_iterative_deepening(self):
+        player = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(player, "Opponent", shuffle_moves=False)
+        game.apply_move((2, 3))
+        game.apply_move((4, 4))
+        steps = player.iterative_deepening(game, lambda: float("inf"))
+        moves = [next(steps) for _ in range(3)]
+        steps.close()
+        # the first legal move, then the result of depth 1 and depth 2
+        self.assertEqual(moves[0], game.get_legal_moves()[0])
+        player.time_left = lambda: float("inf")
+        self.assertEqual(moves[1:], [player.alphabeta(game, 1, selective=True),
+                                     player.alphabeta(game, 2, selective=True)])
+
+    def test_run_games(self):
+        boards = [isolation.Board(self.random_player, self.forfeit_player),
+                  isolation.Board(self.forfeit_player, self.random_player),
+                  isolation.Board(self.random_player, RandomPlayer())]
+        results = game_scheduler.run_games(boards, time_limit=150)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][0], self.random_player)
+        self.assertEqual(results[0][2], "forfeit")
+        self.assertEqual(results[1][0], self.random_player)
+        self.assertEqual(results[1][1], [])
+        # the history of a finished game replays to the final position
+        winner, history, termination = results[2]
+        self.assertEqual(termination, "illegal move")
+        replay = isolation.Board("p1", "p2")
+        for move in history:
+            self.assertIn(tuple(move), replay.get_legal_moves())
+            replay.apply_move(tuple(move))
+        self.assertEqual(replay.to_bytes(), boards[2].to_bytes())
+        self.assertEqual(replay.get_legal_moves(), [])
+
+    def test_play_games_processes(self):
+        boards = [isolation.Board(self.random_player, self.forfeit_player) for _ in range(2)]
+        boards += [isolation.Board(self.forfeit_player, self.random_player) for _ in range(2)]
+        results = game_scheduler.play_games(boards, time_limit=150, processes=2)
+        self.assertEqual([winner for winner, _, _ in results], [self.random_player] * 4)
+        self.assertEqual([termination for _, _, termination in results], ["forfeit"] * 4)
+        # the boards are played in the workers and left unchanged here
+        self.assertEqual([board.move_count for board in boards], [0] * 4)
+
+    def test_play_games_shared_pool(self):
+        # a player that has searched before keeps its timer
+        player = game_agent.AlphaBetaPlayer()
+        timer = lambda: 0.
+        player.time_left = timer
+        boards = [isolation.Board(self.forfeit_player, player) for _ in range(3)]
+        with multiprocessing.Pool(2) as pool:
+            for _ in range(2):
+                results = game_scheduler.play_games(boards, time_limit=150, pool=pool)
+                self.assertEqual([winner for winner, _, _ in results], [player] * 3)
+        self.assertIs(player.time_left, timer)
+
+    def test_pickle_board(self):
+        for seed in (None, 5):
+            game = isolation.Board("p1", "p2", seed=seed)
+            game.apply_move((3, 3))
+            board = pickle.loads(pickle.dumps(game))
+            self.assertEqual(board.to_bytes(), game.to_bytes())
+            self.assertEqual(sorted(board.get_legal_moves()), sorted(game.get_legal_moves()))
+
+
 if __name__ == '__main__':
     unittest.main()
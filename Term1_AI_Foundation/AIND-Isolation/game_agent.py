@@ -2,11 +2,171 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import math
 import random
-from sklearn.neighbors import DistanceMetric
-MANHATTAN_DIST = DistanceMetric.get_metric('manhattan')
-MINKOWSKI_DIST = DistanceMetric.get_metric('minkowski')
-CHEBYSHEV_DIST = DistanceMetric.get_metric('chebyshev')
+
+# distance metrics over (column, row) offsets; minkowski uses p=2
+DISTANCE_METRICS = {
+    'manhattan': lambda dx, dy: abs(dx) + abs(dy),
+    'chebyshev': lambda dx, dy: max(abs(dx), abs(dy)),
+    'minkowski': lambda dx, dy: math.hypot(dx, dy),
+}
+_DISTANCE_TABLES = {}
+_KNIGHT_SHIFTS = {}
+
+# knight moves as (row, column) offsets
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+def distance_tables(width, height):
+    """Return the precomputed distance lookup tables for a board size.
+
+    Cells are indexed as in `isolation.Board`, i.e. the cell (row, column)
+    has index row + column * height. The tables are built on first use and
+    shared by all boards of the same size.
+
+    Parameters
+    ----------
+    width, height : int
+        The board dimensions.
+
+    Returns
+    -------
+    dict
+        Maps each name in DISTANCE_METRICS to a pair of tuples
+        (to_center, between): to_center[idx] is the distance from cell idx
+        to the board center (width / 2, height / 2), and
+        between[idx1 * width * height + idx2] the distance between two cells.
+    """
+    key = (width, height)
+    if key not in _DISTANCE_TABLES:
+        cells = [(idx % height, idx // height) for idx in range(width * height)]
+        w, h = width / 2., height / 2.
+        tables = {}
+        for name, dist in DISTANCE_METRICS.items():
+            to_center = tuple(float(dist(c - w, r - h)) for r, c in cells)
+            between = tuple(float(dist(c1 - c2, r1 - r2))
+                            for r1, c1 in cells for r2, c2 in cells)
+            tables[name] = (to_center, between)
+        _DISTANCE_TABLES[key] = tables
+    return _DISTANCE_TABLES[key]
+
+
+def center_distance(game, player, metric):
+    """Return the distance from the player's location to the board center
+    using one of the DISTANCE_METRICS.
+    """
+    row, col = game.get_player_location(player)
+    to_center, _ = distance_tables(game.width, game.height)[metric]
+    return to_center[row + col * game.height]
+
+
+def player_distance(game, metric):
+    """Return the distance between the two players' locations using one of
+    the DISTANCE_METRICS.
+    """
+    row1, col1 = game.get_player_location(game.active_player)
+    row2, col2 = game.get_player_location(game.inactive_player)
+    _, between = distance_tables(game.width, game.height)[metric]
+    return between[(row1 + col1 * game.height) * game.width * game.height +
+                   row2 + col2 * game.height]
+
+
+def knight_shifts(width, height):
+    """Return the (shift, source_mask) pairs that move a bitboard of the given
+    size one knight move in each direction.  Bits are numbered like the
+    cells of `isolation.Board`, so moving by (dr, dc) is a shift by
+    dr + dc * height applied to the cells in source_mask, i.e. the cells
+    whose destination stays on the board.
+    """
+    key = (width, height)
+    if key not in _KNIGHT_SHIFTS:
+        shifts = []
+        for dr, dc in DIRECTIONS:
+            source_mask = 0
+            for r in range(max(0, -dr), min(height, height - dr)):
+                for c in range(max(0, -dc), min(width, width - dc)):
+                    source_mask |= 1 << (r + c * height)
+            shifts.append((dr + dc * height, source_mask))
+        _KNIGHT_SHIFTS[key] = tuple(shifts)
+    return _KNIGHT_SHIFTS[key]
+
+
+def knight_expand(frontier, shifts):
+    """Return the bitboard of all cells one knight move away from any cell of
+    the frontier bitboard (blocked cells are not removed).
+    """
+    reached = 0
+    for shift, source_mask in shifts:
+        if shift > 0:
+            reached |= (frontier & source_mask) << shift
+        else:
+            reached |= (frontier & source_mask) >> -shift
+    return reached
+
+
+def territory_score(game, player):
+    """Calculate the heuristic value of a game state from the point of view
+    of the given player as the difference in territory (Voronoi regions):
+    both players flood fill the open cells with knight moves at the same
+    time, starting with the player to move, and each open cell belongs to
+    the player who can reach it first.
+
+    The flood fill expands whole bitboard frontiers per ply using
+    `knight_shifts`, so the cost is a few big-integer operations per ply
+    rather than per cell.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : object
+        A player instance in the current game (i.e., an object corresponding to
+        one of the player objects `game.__player_1__` or `game.__player_2__`.)
+
+    Returns
+    -------
+    float
+        The heuristic value of the current game state to the specified player.
+    """
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    mover_loc = game.get_player_location(game.active_player)
+    waiter_loc = game.get_player_location(game.inactive_player)
+    if mover_loc is None or waiter_loc is None:
+        # no territory before both players are placed: use the "improved"
+        # score (difference in the number of legal moves) instead
+        own_moves = len(game.get_legal_moves(player))
+        opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+        return float(own_moves - opp_moves)
+
+    shifts = knight_shifts(game.width, game.height)
+    row, col = mover_loc
+    mover = 1 << (row + col * game.height)
+    row, col = waiter_loc
+    waiter = 1 << (row + col * game.height)
+    unclaimed = ~game.get_blocked_mask() & ((1 << (game.width * game.height)) - 1)
+
+    mover_cells = waiter_cells = 0
+    while mover or waiter:
+        mover = knight_expand(mover, shifts) & unclaimed
+        unclaimed &= ~mover
+        waiter = knight_expand(waiter, shifts) & unclaimed
+        unclaimed &= ~waiter
+        mover_cells |= mover
+        waiter_cells |= waiter
+
+    territory = bin(mover_cells).count("1") - bin(waiter_cells).count("1")
+    if player == game.active_player:
+        return float(territory)
+    return float(-territory)
 
 
 class SearchTimeout(Exception):
@@ -44,10 +204,8 @@ def custom_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    #minkowski distance to the center
-    y, x = game.get_player_location(player)
-    w, h = game.width / 2., game.height / 2.
-    return(CHEBYSHEV_DIST.pairwise([(x,y), (w,h)])[0][1])
+    #chebyshev distance to the center
+    return center_distance(game, player, 'chebyshev')
     
     
 def custom_score_2(game, player):
@@ -113,9 +271,7 @@ def custom_score_3(game, player):
     if game.is_winner(player):
         return float("inf")
     #minkowski distance to the center
-    y, x = game.get_player_location(player)
-    w, h = game.width / 2., game.height / 2.
-    return(MINKOWSKI_DIST.pairwise([(x,y), (w,h)])[0][1])
+    return center_distance(game, player, 'minkowski')
 
 
 class IsolationPlayer:
@@ -318,7 +474,52 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    The iterative deepening search of `get_move()` is selective: horizon
+    nodes where either player has at most EXTENSION_MOBILITY moves are
+    extended by one ply (at most MAX_EXTENSIONS times per line) because the
+    static heuristic is unreliable next to a partition, and with at least
+    LMR_MIN_DEPTH plies left every move after the first LMR_MOVE_INDEX is
+    searched one ply shallower first, and searched again to full depth if it
+    improves on the current bound (late move reductions).  A direct call to
+    `alphabeta(game, depth)` is a plain depth-limited search unless it is
+    passed selective=True.
+
+    If `tablebase` is set to a `tablebase.Tablebase`, positions it covers are
+    scored exactly from the table instead of being searched.  If the score
+    function has a `score_batch` method (see `learned_eval`), the quiet
+    children of each node above the horizon are scored LEAF_BATCH_SIZE at a
+    time: larger chunks mean fewer calls, smaller ones fewer wasted
+    evaluations when an early child causes a cutoff.  If
+    `profiler` is set (see `search_profiler`), the index of the move that
+    caused each beta cutoff is reported to it.
     """
+    tablebase = None
+    profiler = None
+    EXTENSION_MOBILITY = 1
+    MAX_EXTENSIONS = 2
+    LMR_MIN_DEPTH = 3
+    LMR_MOVE_INDEX = 3
+    LEAF_BATCH_SIZE = 4
+    # selective search features enabled for the search in progress
+    _extend = False
+    _reduce = False
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 use_extensions=True, use_reductions=True):
+        """
+        Params:
+            use_extensions : bool
+                Extend volatile horizon nodes in the iterative deepening search.
+
+            use_reductions : bool
+                Use late move reductions in the iterative deepening search.
+
+        The other parameters are those of IsolationPlayer.
+        """
+        super().__init__(search_depth, score_fn, timeout)
+        self.use_extensions = use_extensions
+        self.use_reductions = use_reductions
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -350,28 +551,61 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
+        best_move = (-1, -1)
+        for best_move in self.iterative_deepening(game, time_left):
+            pass
+        return best_move
+
+    def iterative_deepening(self, game, time_left):
+        """Run the iterative deepening search one depth at a time.
+
+        This generator yields the best move found so far, first the initial
+        move and then the result of each completed depth, until the timer
+        expires. The caller can suspend the search between depths (e.g., to
+        interleave the searches of several games in one process), and the
+        timer is reinstalled each time the search resumes, so the same player
+        can search several games in turns.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn.
+
+        Yields
+        ------
+        (int, int)
+            The best move so far; (-1, -1) if there are no legal moves.
+        """
         self.time_left = time_left
-        # Initialize the best move so that this function returns something
-        # in case the search fails due to timeout
+        # Initialize the best move so that the search returns something
+        # in case it fails due to timeout
         available_moves = game.get_legal_moves()
         best_move = (-1, -1)
-        for move in available_moves:    
+        for move in available_moves:
             best_move = move
             break
-        
+        yield best_move
+
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            depth = 0
+            depth = 1
             while 1:
-                best_move = self.alphabeta(game, depth)
+                self.time_left = time_left
+                best_move = self.alphabeta(game, depth, selective=True)
                 depth += 1
+                yield best_move
 
         except SearchTimeout:
             pass
-        return best_move
 
-    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"),
+                  selective=False):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
 
@@ -399,6 +633,11 @@ class AlphaBetaPlayer(IsolationPlayer):
         beta : float
             Beta limits the upper bound of search on maximizing layers
 
+        selective : bool
+            If True, use the search extensions and late move reductions
+            enabled by use_extensions and use_reductions; otherwise search
+            every move to exactly the given depth.
+
         Returns
         -------
         (int, int)
@@ -418,6 +657,8 @@ class AlphaBetaPlayer(IsolationPlayer):
         """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        self._extend = selective and self.use_extensions
+        self._reduce = selective and self.use_reductions
         # get the list of possible legal moves for the active player in 
         # the current state.
         available_moves = game.get_legal_moves()
@@ -428,17 +669,19 @@ class AlphaBetaPlayer(IsolationPlayer):
         for move in available_moves:    
             maximizing_move = move
             break
-        for move in available_moves:
+        for idx, move in enumerate(available_moves):
             curr_score = self.min_value(game.forecast_move(move), depth-1, alpha, beta)
             if curr_score > max_score:
                 max_score = curr_score
                 maximizing_move = move
             if max_score >= beta:
+                if self.profiler is not None:
+                    self.profiler.record_cutoff(idx, len(available_moves))
                 return maximizing_move
             alpha = max(max_score, alpha)
         return maximizing_move
 
-    def max_value(self, game, depth, alpha, beta):
+    def max_value(self, game, depth, alpha, beta, extensions=0):
         """
         Function to find max values among all the possible 
         1ply actions
@@ -458,27 +701,63 @@ class AlphaBetaPlayer(IsolationPlayer):
             beta : float
                 Beta limits the upper bound of search on maximizing layers
 
+            extensions : int
+                Number of plies already added to this line by search extensions
+
         Returns:
             v: the max value among all possible 1ply actions.
             actionL the action that provided the maximum value among all 1ply actions.
         """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        # positions with few empty cells are solved in the tablebase
+        value = self.probe_tablebase(game)
+        if value is not None:
+            return value
         # check if its the end game and or depth is 0
         available_moves = game.get_legal_moves()
-        if len(available_moves) == 0 or depth == 0:
+        if len(available_moves) == 0:
             return self.score(game, self)
+        if depth == 0:
+            if not self.extends(game, available_moves, extensions):
+                return self.score(game, self)
+            depth, extensions = 1, extensions + 1
+        reduce = self._reduce and depth >= self.LMR_MIN_DEPTH
+        if reduce:
+            available_moves = self.order_moves(game, available_moves)
+        # at the horizon the children can be scored together, a chunk at a
+        # time so that a cutoff still saves the evaluation of later chunks
+        children, static_scores = None, None
+        if depth == 1 and hasattr(self.score, 'score_batch'):
+            children = [None] * len(available_moves)
+            static_scores = [None] * len(available_moves)
         max_score = float("-inf")
-        for move in available_moves:
-            curr_score = self.min_value(game.forecast_move(move), depth-1, alpha, beta)
+        for idx, move in enumerate(available_moves):
+            if children is not None and idx % self.LEAF_BATCH_SIZE == 0:
+                self.batch_leaf_scores(game, available_moves, extensions, idx,
+                                       children, static_scores)
+            if static_scores is not None and static_scores[idx] is not None:
+                curr_score = static_scores[idx]
+            elif reduce and idx >= self.LMR_MOVE_INDEX:
+                child = game.forecast_move(move)
+                # late moves are searched one ply shallower first, and
+                # searched again to full depth if the reduced value beats alpha
+                curr_score = self.min_value(child, depth-2, alpha, beta, extensions)
+                if curr_score > alpha:
+                    curr_score = self.min_value(child, depth-1, alpha, beta, extensions)
+            else:
+                child = children[idx] if children else game.forecast_move(move)
+                curr_score = self.min_value(child, depth-1, alpha, beta, extensions)
             if curr_score > max_score:
                 max_score = curr_score
             if max_score >= beta:
+                if self.profiler is not None:
+                    self.profiler.record_cutoff(idx, len(available_moves))
                 return max_score
             alpha = max(max_score, alpha)
         return max_score
 
-    def min_value(self, game, depth, alpha, beta):
+    def min_value(self, game, depth, alpha, beta, extensions=0):
         """
         Function to find min values among all the possible 
         1ply actions
@@ -498,25 +777,189 @@ class AlphaBetaPlayer(IsolationPlayer):
             beta : float
                 Beta limits the upper bound of search on maximizing layers
 
+            extensions : int
+                Number of plies already added to this line by search extensions
+
         Returns:
             v: the min value among all possible 1ply actions.
             actionL the action that provided the minimum value among all 1ply actions.
         """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        # positions with few empty cells are solved in the tablebase
+        value = self.probe_tablebase(game)
+        if value is not None:
+            return value
         # check if its the end game and or depth is 0
         available_moves = game.get_legal_moves()
-        if len(available_moves) == 0 or depth == 0:
+        if len(available_moves) == 0:
             return self.score(game, self)
+        if depth == 0:
+            if not self.extends(game, available_moves, extensions):
+                return self.score(game, self)
+            depth, extensions = 1, extensions + 1
+        reduce = self._reduce and depth >= self.LMR_MIN_DEPTH
+        if reduce:
+            available_moves = self.order_moves(game, available_moves)
+        # at the horizon the children can be scored together, a chunk at a
+        # time so that a cutoff still saves the evaluation of later chunks
+        children, static_scores = None, None
+        if depth == 1 and hasattr(self.score, 'score_batch'):
+            children = [None] * len(available_moves)
+            static_scores = [None] * len(available_moves)
         min_score = float("inf")
-        for move in available_moves:
-            curr_score = self.max_value(game.forecast_move(move), depth-1, alpha, beta)
+        for idx, move in enumerate(available_moves):
+            if children is not None and idx % self.LEAF_BATCH_SIZE == 0:
+                self.batch_leaf_scores(game, available_moves, extensions, idx,
+                                       children, static_scores)
+            if static_scores is not None and static_scores[idx] is not None:
+                curr_score = static_scores[idx]
+            elif reduce and idx >= self.LMR_MOVE_INDEX:
+                child = game.forecast_move(move)
+                # late moves are searched one ply shallower first, and
+                # searched again to full depth if the reduced value beats beta
+                curr_score = self.max_value(child, depth-2, alpha, beta, extensions)
+                if curr_score < beta:
+                    curr_score = self.max_value(child, depth-1, alpha, beta, extensions)
+            else:
+                child = children[idx] if children else game.forecast_move(move)
+                curr_score = self.max_value(child, depth-1, alpha, beta, extensions)
             if curr_score < min_score:
                 min_score = curr_score
             if min_score <= alpha:
+                if self.profiler is not None:
+                    self.profiler.record_cutoff(idx, len(available_moves))
                 return min_score
             beta = min(min_score, beta)
         return min_score
 
-        
-        
\ No newline at end of file
+    def batch_leaf_scores(self, game, available_moves, extensions, start,
+                          children, scores):
+        """
+        Function to score the next LEAF_BATCH_SIZE children of a node one
+        ply above the search horizon with a single call to the score
+        function's `score_batch(games, player)` method (e.g., a learned
+        evaluator that scores them with one matrix-vector product).
+
+        Params:
+            game : isolation.Board
+                The parent position.
+
+            available_moves : list
+                The legal moves of the active player in the parent position.
+
+            extensions : int
+                Number of plies already added to this line by search extensions
+
+            start : int
+                Index in available_moves of the first child of the chunk
+
+            children, scores : list
+                Filled in place with the child positions of the chunk and
+                their static scores; children that must still be searched
+                (tablebase hits, terminal or volatile positions) keep a
+                score of None.
+        """
+        end = min(start + self.LEAF_BATCH_SIZE, len(available_moves))
+        quiet = []
+        for idx in range(start, end):
+            child = children[idx] = game.forecast_move(available_moves[idx])
+            if self.probe_tablebase(child) is not None:
+                continue
+            child_moves = child.get_legal_moves()
+            if not child_moves:
+                continue
+            if self.extends(child, child_moves, extensions):
+                continue
+            quiet.append(idx)
+        if quiet:
+            batch = self.score.score_batch([children[idx] for idx in quiet], self)
+            for idx, value in zip(quiet, batch):
+                scores[idx] = value
+
+    def probe_tablebase(self, game):
+        """
+        Function to look up the exact value of a position in the endgame
+        tablebase once the number of empty cells is small enough.
+
+        Params:
+            game : isolation.Board
+                The position to look up.
+
+        Returns:
+            float or None: +inf/-inf if the position is a win/loss for this
+                player, None if there is no tablebase or it does not cover
+                the position.
+        """
+        if self.tablebase is None:
+            return None
+        # every move blocks one cell, so this is len(game.get_blank_spaces())
+        # without building the list at every node
+        if game.width * game.height - game.move_count > self.tablebase.max_empty:
+            return None
+        return self.tablebase.score(game, self)
+
+    def extends(self, game, available_moves, extensions):
+        """
+        Function to decide whether a position at the search horizon is
+        searched one ply deeper instead of being scored.
+
+        Params:
+            game : isolation.Board
+                The position at the search horizon.
+
+            available_moves : list
+                The legal moves of the active player in this position.
+
+            extensions : int
+                Number of plies already added to this line by search extensions
+
+        Returns:
+            bool: True if extensions are enabled for the search in progress,
+                the line has been extended fewer than MAX_EXTENSIONS times
+                and the position is volatile.
+        """
+        return (self._extend and extensions < self.MAX_EXTENSIONS and
+                self.is_volatile(game, available_moves))
+
+    def is_volatile(self, game, available_moves):
+        """
+        Function to decide whether a leaf position is too unstable for the
+        static evaluation, i.e. either player is close to being cut off so a
+        partition or a win/loss may be one move beyond the search horizon.
+
+        Params:
+            game : isolation.Board
+                The position at the search horizon.
+
+            available_moves : list
+                The legal moves of the active player in this position.
+
+        Returns:
+            bool: True if the search should be extended by one ply.
+        """
+        if len(available_moves) <= self.EXTENSION_MOBILITY:
+            return True
+        opp_moves = game.get_legal_moves(game.inactive_player)
+        return len(opp_moves) <= self.EXTENSION_MOBILITY
+
+    def order_moves(self, game, available_moves):
+        """
+        Function to sort the moves so that the most promising ones are
+        searched first: moves that leave the mover the most onward moves come
+        first, which is what late move reductions rely on.
+
+        Params:
+            game : isolation.Board
+                The position where the moves are played.
+
+            available_moves : list
+                The legal moves of the active player in this position.
+
+        Returns:
+            list: the moves sorted by decreasing onward mobility.
+        """
+        def mobility(move):
+            r, c = move
+            return sum(game.move_is_legal((r + dr, c + dc)) for dr, dc in DIRECTIONS)
+        return sorted(available_moves, key=mobility, reverse=True)
@@ -0,0 +1,264 @@
+"""Play many Isolation games concurrently in one process.
+
+`Board.play()` runs one game at a time, so a tournament process is busy with
+a single game from start to finish.  The scheduler instead keeps every game
+in progress together with the suspended search of the player to move, and
+advances them round-robin one search step at a time.  A step is one depth of
+the iterative deepening search of players that implement
+`iterative_deepening()` (see `AlphaBetaPlayer`), or a whole `get_move()` call
+for other players.
+
+Each game has a virtual clock that only runs while that game's search is
+being stepped, so the time limit of a move is measured in the CPU time the
+move actually received no matter how many other games share the process.
+The same player object can therefore take part in many games at once.  To
+use several cores, `play_games(..., processes=N)` splits the games between N
+worker processes, each running its own scheduler, which needs far fewer
+processes (and less memory) than one process per game.  Callers that play
+many batches of games pass one `multiprocessing.Pool` to every call with
+`play_games(..., pool=pool)` instead.
+
+    python game_scheduler.py -n 40 --processes 4
+"""
+import argparse
+import multiprocessing
+import random
+import timeit
+from collections import deque
+
+from isolation import Board
+from isolation.isolation import TIME_LIMIT_MILLIS
+
+
+class VirtualClock:
+    """Move timer that only advances between start() and stop().
+
+    Parameters
+    ----------
+    time_limit : numeric
+        The number of milliseconds available for the move.
+    """
+
+    def __init__(self, time_limit):
+        self.time_limit = time_limit
+        self.elapsed = 0.
+        self._started = None
+
+    def start(self):
+        self._started = 1000 * timeit.default_timer()
+
+    def stop(self):
+        self.elapsed += 1000 * timeit.default_timer() - self._started
+        self._started = None
+
+    def time_left(self):
+        elapsed = self.elapsed
+        if self._started is not None:
+            elapsed += 1000 * timeit.default_timer() - self._started
+        return self.time_limit - elapsed
+
+
+def search_steps(player, game, time_left):
+    """Yield the best move of the player after each step of its search. """
+    if hasattr(player, "iterative_deepening"):
+        for move in player.iterative_deepening(game, time_left):
+            yield move
+    else:
+        yield player.get_move(game, time_left)
+
+
+class ScheduledGame:
+    """A game in progress and the suspended search of the player to move.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        The game position; it is updated as the game is played.
+
+    time_limit : numeric
+        The number of milliseconds each player gets per move.
+    """
+
+    def __init__(self, board, time_limit):
+        self.board = board
+        self.time_limit = time_limit
+        self.history = []
+        self.result = None  # (winner, history, termination) once finished
+        self._begin_move()
+
+    def _begin_move(self):
+        self.legal_moves = self.board.get_legal_moves()
+        self.clock = VirtualClock(self.time_limit)
+        self.move = None
+        self._steps = search_steps(self.board.active_player, self.board.copy(),
+                                   self.clock.time_left)
+
+    def step(self):
+        """Advance the search of the player to move by one step, and play
+        the move once the search is over.
+
+        Returns
+        -------
+        bool
+            True if the game is over.
+        """
+        self.clock.start()
+        try:
+            self.move = next(self._steps)
+            finished = False
+        except StopIteration:
+            finished = True
+        finally:
+            self.clock.stop()
+
+        if self.clock.time_left() < 0:
+            return self._finish("timeout")
+        if finished:
+            return self._play_move()
+        return False
+
+    def _play_move(self):
+        # the same rules as Board.play()
+        move = Board.NOT_MOVED if self.move is None else self.move
+        if move not in self.legal_moves:
+            if self.legal_moves:
+                return self._finish("forfeit")
+            return self._finish("illegal move")
+        self.history.append(list(move))
+        self.board.apply_move(move)
+        self._begin_move()
+        return False
+
+    def _finish(self, termination):
+        self.result = self.board.inactive_player, self.history, termination
+        self._steps.close()
+        return True
+
+
+def run_games(boards, time_limit=TIME_LIMIT_MILLIS):
+    """Play all the games to the end in this process, advancing them
+    round-robin one search step at a time.
+
+    Parameters
+    ----------
+    boards : list<`isolation.Board`>
+        The starting positions; they are modified as the games are played.
+
+    time_limit : numeric (optional)
+        The number of milliseconds each player gets per move.
+
+    Returns
+    -------
+    list<(player, list<[(int, int),]>, str)>
+        The result of each game in the same format as `Board.play()`.
+    """
+    games = [ScheduledGame(board, time_limit) for board in boards]
+    waiting = deque(games)
+    while waiting:
+        game = waiting.popleft()
+        if not game.step():
+            waiting.append(game)
+    return [game.result for game in games]
+
+
+def _run_chunk(args):
+    boards, time_limit = args
+    return [(1 if winner == board._player_1 else 2, history, termination)
+            for board, (winner, history, termination)
+            in zip(boards, run_games(boards, time_limit))]
+
+
+def play_games(boards, time_limit=TIME_LIMIT_MILLIS, processes=None, pool=None):
+    """Play all the games, split between worker processes that each run a
+    scheduler.
+
+    The boards and players are copied to the workers, so they must be
+    picklable, and the boards passed in are not modified when the games are
+    played in worker processes.
+
+    Parameters
+    ----------
+    processes : int (optional)
+        The number of worker processes; the games are played in this process
+        if None or 1 and no pool is given.
+
+    pool : `multiprocessing.Pool` (optional)
+        Worker processes to play the games in instead of starting new ones,
+        so that a caller playing many small batches of games (e.g., one
+        tournament round at a time) pays the start-up cost once.  The games
+        are split into `processes` chunks, or sent one at a time if None.
+
+    Returns
+    -------
+    list<(player, list<[(int, int),]>, str)>
+        The result of each game in the same format as `Board.play()`.
+    """
+    if pool is None and (not processes or processes <= 1 or len(boards) <= 1):
+        return run_games(boards, time_limit)
+    num_chunks = min(processes or len(boards), len(boards))
+    chunks = [(boards[i::num_chunks], time_limit) for i in range(num_chunks)]
+    # the timer of a player's last search is a closure that cannot be
+    # pickled; it is cleared while the games are sent and restored after
+    timers = {}
+    for board in boards:
+        for player in (board._player_1, board._player_2):
+            if getattr(player, "time_left", None) is not None:
+                timers[id(player)] = player, player.time_left
+                player.time_left = None
+    try:
+        if pool is None:
+            with multiprocessing.Pool(num_chunks) as pool:
+                chunk_results = pool.map(_run_chunk, chunks)
+        else:
+            chunk_results = pool.map(_run_chunk, chunks)
+    finally:
+        for player, time_left in timers.values():
+            player.time_left = time_left
+    results = [None] * len(boards)
+    for i, chunk in enumerate(chunk_results):
+        for j, (winner, history, termination) in enumerate(chunk):
+            board = boards[i + j * num_chunks]
+            winner = board._player_1 if winner == 1 else board._player_2
+            results[i + j * num_chunks] = winner, history, termination
+    return results
+
+
+def main(args):
+    from game_agent import AlphaBetaPlayer
+    from sample_players import improved_score
+
+    rng = random.Random(args.seed)
+    player_1 = AlphaBetaPlayer(score_fn=improved_score)
+    player_2 = AlphaBetaPlayer(score_fn=improved_score)
+    boards = []
+    for _ in range(args.num_games):
+        board = Board(player_1, player_2)
+        for _ in range(2):
+            board.apply_move(rng.choice(board.get_legal_moves()))
+        boards.append(board)
+
+    start = timeit.default_timer()
+    results = play_games(boards, args.time_limit, args.processes)
+    elapsed = timeit.default_timer() - start
+    terminations = {}
+    for _, _, termination in results:
+        terminations[termination] = terminations.get(termination, 0) + 1
+    wins = sum(winner == player_1 for winner, _, _ in results)
+    print("Played {} games in {:.1f}s ({:.2f} games/s); player 1 won {}".format(
+        len(results), elapsed, len(results) / elapsed, wins))
+    print("Terminations: " + ", ".join(
+        "{} {}".format(n, t) for t, n in sorted(terminations.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many Isolation games " +
+        "concurrently with a round-robin scheduler.")
+    parser.add_argument('-n', '--num-games', type=int, default=20,
+                        help="Number of games to play (default 20).")
+    parser.add_argument('-t', '--time-limit', type=int, default=TIME_LIMIT_MILLIS,
+                        help="Milliseconds per move (default {}).".format(TIME_LIMIT_MILLIS))
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Number of worker processes (default 1).")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for the random openings.")
+    main(parser.parse_args())
@@ -8,11 +8,120 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 import random
+import struct
 import timeit
+from array import array
 from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# Header of the compact board encoding: width, height, move count,
+# initiative, player 1 and player 2 locations (NO_LOCATION if not moved)
+_ENCODING_HEADER = struct.Struct("<BBHBBB")
+_NO_LOCATION = 255
+
+# Knight-move distances between all pairs of cells on an empty board, keyed
+# by (width, height); pairs that no sequence of moves connects are stored as
+# _UNREACHABLE
+_KNIGHT_DISTANCES = {}
+_UNREACHABLE = 255
+
+# Per-cell bitmasks of the cells at each knight distance, keyed by (width,
+# height)
+_KNIGHT_RINGS = {}
+
+
+def knight_distances(width, height):
+    """Return the all-pairs knight-move distance table of an empty board.
+
+    Parameters
+    ----------
+    width, height : int
+        The board dimensions.
+
+    Returns
+    -------
+    array.array
+        A flat array of unsigned bytes where entry idx1 * width * height +
+        idx2 is the minimum number of knight moves between the cells with
+        indices idx1 and idx2 (the cell (row, column) has index row + column
+        * height), or 255 if there is no path. The table is built on first
+        use and shared by all boards of the same size.
+    """
+    key = (width, height)
+    if key not in _KNIGHT_DISTANCES:
+        cells = width * height
+        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2), (1, 2), (2, -1), (2, 1)]
+        table = array("B", [_UNREACHABLE]) * (cells * cells)
+        for start in range(cells):
+            base = start * cells
+            table[base + start] = 0
+            frontier = [start]
+            distance = 0
+            while frontier:
+                distance += 1
+                next_frontier = []
+                for idx in frontier:
+                    r, c = idx % height, idx // height
+                    for dr, dc in directions:
+                        if 0 <= r + dr < height and 0 <= c + dc < width:
+                            cell = r + dr + (c + dc) * height
+                            if table[base + cell] == _UNREACHABLE:
+                                table[base + cell] = distance
+                                next_frontier.append(cell)
+                frontier = next_frontier
+        _KNIGHT_DISTANCES[key] = table
+    return _KNIGHT_DISTANCES[key]
+
+
+def knight_rings(width, height):
+    """Return the cells at each knight-move distance from every cell of an
+    empty board.
+
+    Parameters
+    ----------
+    width, height : int
+        The board dimensions.
+
+    Returns
+    -------
+    list<tuple<int>>
+        Entry idx is a tuple whose d-th element is the bitmask (numbered as
+        in Board.get_blocked_mask()) of the cells exactly d knight moves
+        from the cell with index idx. Unreachable cells are in no ring. The
+        rings are derived from knight_distances() on first use and shared
+        by all boards of the same size.
+    """
+    key = (width, height)
+    if key not in _KNIGHT_RINGS:
+        cells = width * height
+        table = knight_distances(width, height)
+        rings = []
+        for start in range(cells):
+            masks = []
+            for cell, distance in enumerate(table[start * cells:(start + 1) * cells]):
+                if distance == _UNREACHABLE:
+                    continue
+                while len(masks) <= distance:
+                    masks.append(0)
+                masks[distance] |= 1 << cell
+            rings.append(tuple(masks))
+        _KNIGHT_RINGS[key] = rings
+    return _KNIGHT_RINGS[key]
+
+
+def mask_to_cells(mask):
+    """Return the indices of the set bits of a cell bitmask (numbered as in
+    Board.get_blocked_mask()) in increasing order.
+    """
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -33,11 +142,22 @@ class Board(object):
 
     height : int (optional)
         The number of rows that the board should have.
+
+    seed : hashable (optional)
+        Seed for a private random number generator used to shuffle the
+        legal move lists. Boards created by copy() or forecast_move() share
+        the generator, so a search from a seeded board generates moves in
+        the same order on every run. If None, the global `random` module is
+        used.
+
+    shuffle_moves : bool (optional)
+        If False, legal moves are always returned in a fixed order.
     """
     BLANK = 0
     NOT_MOVED = None
 
-    def __init__(self, player_1, player_2, width=7, height=7):
+    def __init__(self, player_1, player_2, width=7, height=7, seed=None,
+                 shuffle_moves=True):
         self.width = width
         self.height = height
         self.move_count = 0
@@ -45,6 +165,8 @@ class Board(object):
         self._player_2 = player_2
         self._active_player = player_1
         self._inactive_player = player_2
+        self._rng = random if seed is None else random.Random(seed)
+        self._shuffle_moves = shuffle_moves
 
         # The last 3 entries of the board state includes initiative (0 for
         # player 1, 1 for player 2) player 2 last move, and player 1 last move
@@ -52,9 +174,38 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Bitmask of the blocked cells (bit idx set if _board_state[idx] is
+        # not blank), kept in sync by apply_move() for bitboard heuristics
+        self._blocked_mask = 0
+
+        # Legal moves computed for the current position, keyed by the
+        # location they were generated from; cleared by apply_move()
+        self._moves_cache = {}
+
+    def __getstate__(self):
+        # the shared global generator cannot be pickled; it is restored on load
+        state = self.__dict__.copy()
+        if state["_rng"] is random:
+            state["_rng"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._rng is None:
+            self._rng = random
+
     def hash(self):
         return str(self._board_state).__hash__()
 
+    @property
+    def rng(self):
+        """The random number generator of the game: the private generator
+        of a seeded board (shared with its copies), otherwise the global
+        `random` module. Players that make random choices can draw from it
+        to play reproducibly in seeded games.
+        """
+        return self._rng
+
     @property
     def active_player(self):
         """The object registered as the player holding initiative in the
@@ -96,9 +247,76 @@ class Board(object):
         new_board.move_count = self.move_count
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
+        new_board._rng = self._rng
+        new_board._shuffle_moves = self._shuffle_moves
         new_board._board_state = copy(self._board_state)
+        new_board._blocked_mask = self._blocked_mask
+        new_board._moves_cache = copy(self._moves_cache)
         return new_board
 
+    def to_bytes(self):
+        """Return a compact, fixed-size binary encoding of the game state.
+
+        The encoding holds the board size, move count, initiative, both
+        player locations and a bitmask of the blocked cells (bit
+        row + column * height, little-endian), so every board of the same
+        size encodes to `Board.encoded_size(width, height)` bytes. Players
+        are identified only by their index (player 1 or player 2); the
+        player objects are supplied again by `from_bytes()`.
+        """
+        p1_loc, p2_loc = self._board_state[-1], self._board_state[-2]
+        header = _ENCODING_HEADER.pack(
+            self.width, self.height, self.move_count, self._board_state[-3],
+            _NO_LOCATION if p1_loc is Board.NOT_MOVED else p1_loc,
+            _NO_LOCATION if p2_loc is Board.NOT_MOVED else p2_loc)
+        mask_size = (self.width * self.height + 7) // 8
+        return header + self._blocked_mask.to_bytes(mask_size, "little")
+
+    @staticmethod
+    def encoded_size(width, height):
+        """Return the length of `to_bytes()` for a board of the given size. """
+        return _ENCODING_HEADER.size + (width * height + 7) // 8
+
+    @classmethod
+    def from_bytes(cls, data, player_1, player_2, offset=0):
+        """Create a board from the encoding produced by `to_bytes()`.
+
+        Parameters
+        ----------
+        data : bytes-like
+            A buffer holding the encoding (e.g. bytes, bytearray, or a
+            memoryview into a larger message); it is read in place without
+            copying.
+
+        player_1, player_2 : object
+            The players to register as the first and second player.
+
+        offset : int (optional)
+            Position of the encoding within data.
+
+        Returns
+        -------
+        isolation.Board
+        """
+        width, height, move_count, initiative, p1_loc, p2_loc = \
+            _ENCODING_HEADER.unpack_from(data, offset)
+        start = offset + _ENCODING_HEADER.size
+        mask_size = (width * height + 7) // 8
+        mask = int.from_bytes(memoryview(data)[start:start + mask_size], "little")
+
+        board = cls(player_1, player_2, width=width, height=height)
+        board.move_count = move_count
+        if initiative:
+            board._active_player, board._inactive_player = player_2, player_1
+        board._blocked_mask = mask
+        state = board._board_state
+        state[-3] = initiative
+        state[-1] = Board.NOT_MOVED if p1_loc == _NO_LOCATION else p1_loc
+        state[-2] = Board.NOT_MOVED if p2_loc == _NO_LOCATION else p2_loc
+        for idx in mask_to_cells(mask):
+            state[idx] = 1
+        return board
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -142,6 +360,72 @@ class Board(object):
         return [(i, j) for j in range(self.width) for i in range(self.height)
                 if self._board_state[i + j * self.height] == Board.BLANK]
 
+    def get_blocked_mask(self):
+        """Return the blocked cells as an integer bitmask, where the cell
+        (row, column) is bit number row + column * height.
+        """
+        return self._blocked_mask
+
+    def get_knight_distance(self, loc_1, loc_2):
+        """Return the minimum number of knight moves between two locations
+        on an empty board of the same size, ignoring blocked squares.
+
+        Parameters
+        ----------
+        loc_1, loc_2 : (int, int)
+            Coordinate pairs (row, column) on the board.
+
+        Returns
+        -------
+        int or float
+            The number of moves, or float("inf") if either location is None
+            or no sequence of moves connects them.
+        """
+        if loc_1 is None or loc_2 is None:
+            return float("inf")
+        cells = self.width * self.height
+        table = knight_distances(self.width, self.height)
+        distance = table[(loc_1[0] + loc_1[1] * self.height) * cells +
+                         loc_2[0] + loc_2[1] * self.height]
+        return float("inf") if distance == _UNREACHABLE else distance
+
+    def get_players_distance(self):
+        """Return the empty-board knight distance between the two players
+        (see get_knight_distance()).
+        """
+        return self.get_knight_distance(
+            self.get_player_location(self._player_1),
+            self.get_player_location(self._player_2))
+
+    def get_region_distance(self, player, region):
+        """Return the empty-board knight distance from the player to the
+        nearest cell of a region of the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        region : int
+            An integer bitmask of the cells in the region, numbered as in
+            get_blocked_mask() (e.g., ``~game.get_blocked_mask()`` for the
+            open squares).
+
+        Returns
+        -------
+        int or float
+            The smallest distance, or float("inf") if the player has not
+            moved or cannot reach the region.
+        """
+        loc = self.get_player_location(player)
+        if loc is None:
+            return float("inf")
+        rings = knight_rings(self.width, self.height)[loc[0] + loc[1] * self.height]
+        for distance, ring in enumerate(rings):
+            if ring & region:
+                return distance
+        return float("inf")
+
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
 
@@ -188,7 +472,11 @@ class Board(object):
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+        loc = self.get_player_location(player)
+        moves = self._moves_cache.get(loc)
+        if moves is None:
+            moves = self._moves_cache[loc] = self.__get_moves(loc)
+        return list(moves)
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -203,9 +491,11 @@ class Board(object):
         last_move_idx = int(self.active_player == self._player_2) + 1
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
+        self._blocked_mask |= 1 << idx
         self._board_state[-3] ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
+        self._moves_cache = {}
 
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
@@ -259,7 +549,8 @@ class Board(object):
                       (1, -2), (1, 2), (2, -1), (2, 1)]
         valid_moves = [(r + dr, c + dc) for dr, dc in directions
                        if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
+        if self._shuffle_moves:
+            self._rng.shuffle(valid_moves)
         return valid_moves
 
     def print_board(self):
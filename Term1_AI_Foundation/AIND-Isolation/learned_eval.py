@@ -0,0 +1,298 @@
+"""Linear evaluation function for Isolation with weights fit to the outcomes
+of self-play games.
+
+Positions are described by a fixed-length feature vector (see
+FEATURE_NAMES) computed from the point of view of one player, and the
+evaluation is the dot product of the features with a weight vector.  The
+evaluator can be used anywhere a heuristic is expected (e.g.,
+`AlphaBetaPlayer(score_fn=LinearEvaluator.load("weights.npy"))`), and it
+also provides `score_batch()`, which `AlphaBetaPlayer` uses to score all the
+children of a node at the search horizon with one matrix-vector product.
+
+Collect training data and fit the weights with:
+
+    python learned_eval.py selfplay -n 200 -o selfplay.npz
+    python learned_eval.py train selfplay.npz -o weights.npy
+"""
+import argparse
+import random
+
+import numpy as np
+
+from game_agent import (AlphaBetaPlayer, DIRECTIONS, center_distance,
+                        knight_expand, knight_shifts, player_distance)
+from isolation import Board
+from sample_players import improved_score
+
+FEATURE_NAMES = [
+    "bias",
+    "own_moves",
+    "opp_moves",
+    "own_second_moves",
+    "opp_second_moves",
+    "own_center_distance",
+    "opp_center_distance",
+    "player_distance",
+    "own_territory",
+    "opp_territory",
+    "partitioned",
+    "blank_fraction",
+]
+NUM_FEATURES = len(FEATURE_NAMES)
+
+# weights equivalent to improved_score, used until a trained set is loaded
+DEFAULT_WEIGHTS = np.zeros(NUM_FEATURES)
+DEFAULT_WEIGHTS[FEATURE_NAMES.index("own_moves")] = 1.
+DEFAULT_WEIGHTS[FEATURE_NAMES.index("opp_moves")] = -1.
+
+TIME_LIMIT = 150  # number of milliseconds per move in self-play games
+
+
+def second_order_moves(game, moves):
+    """Return the number of knight moves available from each of the moves
+    on the current board, summed over the moves.
+    """
+    return sum(game.move_is_legal((r + dr, c + dc))
+               for r, c in moves for dr, dc in DIRECTIONS)
+
+
+def territory_masks(game, player):
+    """Flood fill the open cells with knight moves from both players.
+
+    Returns
+    -------
+    (int, int, int, int)
+        Bitmasks of the cells the player and the opponent reach first
+        (the player to move winning ties) and of all cells each of them can
+        reach at all; all zero until both players have been placed.
+    """
+    shifts = knight_shifts(game.width, game.height)
+    opponent = game.get_opponent(player)
+    own_loc = game.get_player_location(player)
+    opp_loc = game.get_player_location(opponent)
+    if own_loc is None or opp_loc is None:
+        return 0, 0, 0, 0
+    row, col = own_loc
+    own = 1 << (row + col * game.height)
+    row, col = opp_loc
+    opp = 1 << (row + col * game.height)
+    open_cells = ~game.get_blocked_mask() & ((1 << (game.width * game.height)) - 1)
+
+    # frontiers and claimed cells in turn order, the player to move first
+    own_first = player == game.active_player
+    frontiers = [own, opp] if own_first else [opp, own]
+    claimed = [0, 0]
+    unclaimed = open_cells
+    while frontiers[0] or frontiers[1]:
+        for i in (0, 1):
+            frontiers[i] = knight_expand(frontiers[i], shifts) & unclaimed
+            unclaimed &= ~frontiers[i]
+            claimed[i] |= frontiers[i]
+    if not own_first:
+        claimed.reverse()
+
+    reach = []
+    for start in (own, opp):
+        seen = frontier = start
+        while frontier:
+            frontier = knight_expand(frontier, shifts) & open_cells & ~seen
+            seen |= frontier
+        reach.append(seen & ~start)
+    return claimed[0], claimed[1], reach[0], reach[1]
+
+
+def extract_features(game, player):
+    """Return the feature vector of a non-terminal position from the point of
+    view of player, in the order of FEATURE_NAMES.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        A non-terminal position.  The distance and territory features of a
+        player who has not been placed yet (and the player distance,
+        territory and partition features while either is unplaced) are 0.
+
+    player : object
+        A player instance in the current game.
+
+    Returns
+    -------
+    list<float>
+    """
+    opponent = game.get_opponent(player)
+    own_placed = game.get_player_location(player) is not None
+    opp_placed = game.get_player_location(opponent) is not None
+    own_moves = game.get_legal_moves(player)
+    opp_moves = game.get_legal_moves(opponent)
+    own_cells, opp_cells, own_reach, opp_reach = territory_masks(game, player)
+    cells = game.width * game.height
+    return [
+        1.,
+        float(len(own_moves)),
+        float(len(opp_moves)),
+        float(second_order_moves(game, own_moves)),
+        float(second_order_moves(game, opp_moves)),
+        center_distance(game, player, 'manhattan') if own_placed else 0.,
+        center_distance(game, opponent, 'manhattan') if opp_placed else 0.,
+        player_distance(game, 'manhattan') if own_placed and opp_placed else 0.,
+        float(bin(own_cells).count("1")),
+        float(bin(opp_cells).count("1")),
+        float(own_placed and opp_placed and not own_reach & opp_reach),
+        float(cells - game.move_count) / cells,
+    ]
+
+
+class LinearEvaluator:
+    """Heuristic that scores positions as the dot product of their features
+    with a weight vector.
+
+    Parameters
+    ----------
+    weights : array-like (optional)
+        One weight per entry of FEATURE_NAMES; DEFAULT_WEIGHTS if omitted.
+    """
+
+    def __init__(self, weights=None):
+        if weights is None:
+            weights = DEFAULT_WEIGHTS
+        self.weights = np.asarray(weights, dtype=float)
+        if self.weights.shape != (NUM_FEATURES,):
+            raise ValueError("expected {} weights, got shape {}".format(
+                NUM_FEATURES, self.weights.shape))
+
+    @classmethod
+    def load(cls, path):
+        """Create an evaluator from weights saved by `train`. """
+        return cls(np.load(path))
+
+    def __call__(self, game, player):
+        if game.is_loser(player):
+            return float("-inf")
+
+        if game.is_winner(player):
+            return float("inf")
+
+        return float(np.dot(self.weights, extract_features(game, player)))
+
+    def score_batch(self, games, player):
+        """Score a list of positions (e.g., the siblings at the search
+        horizon) from the point of view of player.
+
+        Returns
+        -------
+        list<float>
+            The same values as calling the evaluator on each position, with
+            the non-terminal positions scored by a single matrix-vector
+            product.
+        """
+        scores = [None] * len(games)
+        rows = []
+        for idx, game in enumerate(games):
+            if game.is_loser(player):
+                scores[idx] = float("-inf")
+            elif game.is_winner(player):
+                scores[idx] = float("inf")
+            else:
+                rows.append(idx)
+        if rows:
+            features = np.array([extract_features(games[idx], player) for idx in rows])
+            for idx, value in zip(rows, features.dot(self.weights)):
+                scores[idx] = float(value)
+        return scores
+
+
+def play_self_play_games(num_games, score_fn=improved_score, time_limit=TIME_LIMIT):
+    """Play games between two alpha-beta agents from random openings and
+    record every non-terminal position after the opening.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        The features of each position from the point of view of the player
+        to move, and the final outcome for that player (1 win, -1 loss).
+    """
+    features, outcomes = [], []
+    for _ in range(num_games):
+        player_1 = AlphaBetaPlayer(score_fn=score_fn)
+        player_2 = AlphaBetaPlayer(score_fn=score_fn)
+        game = Board(player_1, player_2)
+        for _ in range(2):
+            game.apply_move(random.choice(game.get_legal_moves()))
+        replay = game.copy()
+        winner, history, _ = game.play(time_limit=time_limit)
+        for move in history:
+            if replay.get_legal_moves():
+                features.append(extract_features(replay, replay.active_player))
+                outcomes.append(1. if replay.active_player == winner else -1.)
+            replay.apply_move(tuple(move))
+    return np.array(features).reshape(-1, NUM_FEATURES), np.array(outcomes)
+
+
+def train(features, outcomes, l2=1e-3):
+    """Fit evaluation weights by ridge regression of the game outcomes on the
+    position features.
+
+    Parameters
+    ----------
+    features : numpy.ndarray
+        One row of features per position.
+
+    outcomes : numpy.ndarray
+        The outcome of each position for the player it was scored for.
+
+    l2 : float (optional)
+        The ridge penalty (the bias weight is not penalized).
+
+    Returns
+    -------
+    numpy.ndarray
+        The fitted weights.
+    """
+    penalty = l2 * len(outcomes) * np.eye(NUM_FEATURES)
+    penalty[0, 0] = 0.
+    return np.linalg.solve(features.T.dot(features) + penalty,
+                           features.T.dot(outcomes))
+
+
+def main(args):
+    if args.command == "selfplay":
+        features, outcomes = play_self_play_games(args.num_games,
+                                                  time_limit=args.time_limit)
+        np.savez(args.output, features=features, outcomes=outcomes)
+        print("Saved {} positions from {} games to {}".format(
+            len(outcomes), args.num_games, args.output))
+    else:
+        features, outcomes = [], []
+        for path in args.data:
+            data = np.load(path)
+            features.append(data["features"])
+            outcomes.append(data["outcomes"])
+        features, outcomes = np.concatenate(features), np.concatenate(outcomes)
+        weights = train(features, outcomes, l2=args.l2)
+        np.save(args.output, weights)
+        accuracy = np.mean(np.sign(features.dot(weights)) == outcomes)
+        print("Fit {} positions, sign accuracy {:.1f}%".format(
+            len(outcomes), 100 * accuracy))
+        for name, weight in zip(FEATURE_NAMES, weights):
+            print("    {:<22}{:>10.4f}".format(name, weight))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a linear evaluation " +
+        "function for Isolation from self-play games.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+    selfplay = subparsers.add_parser("selfplay", help="Play games and log positions.")
+    selfplay.add_argument('-n', '--num-games', type=int, default=100,
+                          help="Number of games to play (default 100).")
+    selfplay.add_argument('-t', '--time-limit', type=int, default=TIME_LIMIT,
+                          help="Milliseconds per move (default {}).".format(TIME_LIMIT))
+    selfplay.add_argument('-o', '--output', required=True,
+                          help="Path of the .npz file to write.")
+    fit = subparsers.add_parser("train", help="Fit weights to logged positions.")
+    fit.add_argument('data', nargs="+", help="Files written by selfplay.")
+    fit.add_argument('--l2', type=float, default=1e-3,
+                     help="Ridge penalty (default 1e-3).")
+    fit.add_argument('-o', '--output', required=True,
+                     help="Path of the .npy weights file to write.")
+    main(parser.parse_args())
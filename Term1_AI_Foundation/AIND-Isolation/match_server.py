@@ -0,0 +1,388 @@
+"""Play Isolation matches with every agent running in its own worker process.
+
+`Board.play()` calls the agents in the tournament process, so a slow or
+leaky agent affects the memory, garbage collection pauses and timing of
+every other agent.  The match server instead starts long-lived worker
+processes for each agent, sends them positions over local sockets using a
+compact binary protocol, and enforces the move deadlines with its own
+wall clock.  Many games are multiplexed concurrently by one asyncio event
+loop, so the workers stay busy while the server itself does very little.
+
+Protocol (little-endian):
+
+    worker -> server  HELLO    u32 worker id, sent once after connecting
+    server -> worker  REQUEST  u32 request id, u32 time limit (ms),
+                               u8 player index (0 if the worker plays first),
+                               u16 length of the board encoding, followed by
+                               the position encoded by `Board.to_bytes()`
+    worker -> server  REPLY    u32 request id, u8 cell index of the chosen
+                               move (NO_MOVE if the agent returned none)
+
+Cell indices are row + column * height, as in `isolation.Board`.
+
+Example, 20 fair matches between two agents from `AGENTS`:
+
+    python match_server.py AB_Improved AB_Custom -n 20 --workers 2
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import socket
+import struct
+import sys
+import tempfile
+import timeit
+
+from isolation import Board
+from sample_players import (RandomPlayer, open_move_score,
+                            improved_score, center_score)
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
+                        custom_score_2, custom_score_3)
+
+HELLO = struct.Struct("<I")
+REQUEST = struct.Struct("<IIBH")
+REPLY = struct.Struct("<IB")
+NO_MOVE = 255
+
+TIME_LIMIT = 150  # number of milliseconds before timeout
+DRAIN_TIMEOUT = 5.  # seconds to wait for a late reply before killing a worker
+
+
+# agents available by name, matching tournament.py
+AGENTS = {
+    "Random": RandomPlayer,
+    "MM_Open": lambda: MinimaxPlayer(score_fn=open_move_score),
+    "MM_Center": lambda: MinimaxPlayer(score_fn=center_score),
+    "MM_Improved": lambda: MinimaxPlayer(score_fn=improved_score),
+    "AB_Open": lambda: AlphaBetaPlayer(score_fn=open_move_score),
+    "AB_Center": lambda: AlphaBetaPlayer(score_fn=center_score),
+    "AB_Improved": lambda: AlphaBetaPlayer(score_fn=improved_score),
+    "AB_Custom": lambda: AlphaBetaPlayer(score_fn=custom_score),
+    "AB_Custom_2": lambda: AlphaBetaPlayer(score_fn=custom_score_2),
+    "AB_Custom_3": lambda: AlphaBetaPlayer(score_fn=custom_score_3),
+}
+
+
+def load_agent(spec):
+    """Construct an agent from a name in AGENTS or a "module:callable" spec. """
+    if ":" in spec:
+        module_name, _, attr = spec.partition(":")
+        return getattr(importlib.import_module(module_name), attr)()
+    return AGENTS[spec]()
+
+
+def encode_request(request_id, time_limit, player_index, game):
+    """Pack a move request for the player with the given index. """
+    board = game.to_bytes()
+    return REQUEST.pack(request_id, time_limit, player_index, len(board)) + board
+
+
+# ______________________________________________________________________________
+# Worker process
+
+
+def run_worker(spec, address, worker_id):
+    """Connect to the server and answer move requests until it disconnects. """
+    agent = load_agent(spec)
+    opponent = object()
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(address)
+    stream = sock.makefile("rwb")
+    stream.write(HELLO.pack(worker_id))
+    stream.flush()
+
+    time_millis = lambda: 1000 * timeit.default_timer()
+    while True:
+        header = stream.read(REQUEST.size)
+        if len(header) < REQUEST.size:
+            break
+        move_start = time_millis()
+        request_id, time_limit, index, board_size = REQUEST.unpack(header)
+        players = (agent, opponent) if index == 0 else (opponent, agent)
+        game = Board.from_bytes(stream.read(board_size), *players)
+
+        time_left = lambda: time_limit - (time_millis() - move_start)
+        move = agent.get_move(game, time_left)
+        if move is None or not game.move_is_legal(move):
+            cell = NO_MOVE
+        else:
+            cell = move[0] + move[1] * game.height
+        stream.write(REPLY.pack(request_id, cell))
+        stream.flush()
+
+
+# ______________________________________________________________________________
+# Server
+
+
+class Worker:
+    """Server-side handle of one worker process. """
+
+    def __init__(self, worker_id, process, reader, writer):
+        self.worker_id = worker_id
+        self.process = process
+        self.reader = reader
+        self.writer = writer
+
+
+class AgentPool:
+    """A set of worker processes running the same agent.
+
+    Parameters
+    ----------
+    server : MatchServer
+        The server the workers connect to.
+
+    spec : str
+        The agent name or "module:callable" spec passed to the workers.
+
+    size : int
+        The number of worker processes, i.e., how many moves of this agent
+        can be computed at the same time.
+    """
+
+    def __init__(self, server, spec, size):
+        self.server = server
+        self.spec = spec
+        self.size = size
+        self.idle = asyncio.Queue()
+        self.workers = set()
+        self.draining = set()
+        self.next_request = 0
+
+    async def start(self):
+        for _ in range(self.size):
+            await self._add_worker()
+
+    async def stop(self):
+        for task in self.draining:
+            task.cancel()
+        await asyncio.gather(*self.draining, return_exceptions=True)
+        for worker in list(self.workers):
+            await self.server.stop_worker(worker)
+        self.workers.clear()
+
+    async def _add_worker(self):
+        worker = await self.server.spawn_worker(self.spec)
+        self.workers.add(worker)
+        self.idle.put_nowait(worker)
+
+    async def request_move(self, game, player_index, time_limit):
+        """Ask an idle worker for a move in the game.
+
+        Returns
+        -------
+        (int, int) or None
+            The move, (-1, -1) if the agent returned no legal move, or None
+            if the deadline passed before the reply arrived.
+        """
+        worker = await self.idle.get()
+        self.next_request += 1
+        request_id = self.next_request
+        worker.writer.write(encode_request(request_id, time_limit, player_index, game))
+        try:
+            reply = await asyncio.wait_for(worker.reader.readexactly(REPLY.size),
+                                           time_limit / 1000.)
+        except asyncio.TimeoutError:
+            task = asyncio.ensure_future(self._drain(worker, request_id))
+            self.draining.add(task)
+            task.add_done_callback(self.draining.discard)
+            return None
+        self.idle.put_nowait(worker)
+        _, cell = REPLY.unpack(reply)
+        if cell == NO_MOVE:
+            return (-1, -1)
+        return (cell % game.height, cell // game.height)
+
+    async def _drain(self, worker, request_id):
+        """Wait for the late reply of a timed out request before reusing the
+        worker, or replace the worker if it does not answer at all.
+        """
+        try:
+            while True:
+                reply = await asyncio.wait_for(worker.reader.readexactly(REPLY.size),
+                                               DRAIN_TIMEOUT)
+                if REPLY.unpack(reply)[0] == request_id:
+                    break
+            self.idle.put_nowait(worker)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            self.workers.discard(worker)
+            await self.server.stop_worker(worker)
+            await self._add_worker()
+
+
+class MatchServer:
+    """Accepts worker connections on a local socket and plays games between
+    agent pools.
+    """
+
+    def __init__(self):
+        self.address = None
+        self._server = None
+        self._tmpdir = None
+        self._pending = {}
+        self._next_worker = 0
+
+    async def start(self):
+        if hasattr(socket, "AF_UNIX"):
+            self._tmpdir = tempfile.mkdtemp(prefix="isolation-")
+            self.address = os.path.join(self._tmpdir, "match.sock")
+            self._server = await asyncio.start_unix_server(self._on_connect, self.address)
+        else:
+            self._server = await asyncio.start_server(self._on_connect, "127.0.0.1", 0)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        if self._tmpdir is not None:
+            os.remove(self.address)
+            os.rmdir(self._tmpdir)
+
+    async def _on_connect(self, reader, writer):
+        worker_id, = HELLO.unpack(await reader.readexactly(HELLO.size))
+        self._pending.pop(worker_id).set_result((reader, writer))
+
+    async def spawn_worker(self, spec):
+        """Start a worker process and wait until it has connected. """
+        self._next_worker += 1
+        worker_id = self._next_worker
+        connected = asyncio.get_event_loop().create_future()
+        self._pending[worker_id] = connected
+        address = self.address if isinstance(self.address, str) else "{}:{}".format(*self.address)
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "--worker", spec,
+            "--address", address, "--worker-id", str(worker_id),
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+        reader, writer = await connected
+        return Worker(worker_id, process, reader, writer)
+
+    async def stop_worker(self, worker):
+        worker.writer.close()
+        if worker.process.returncode is None:
+            worker.process.kill()
+        await worker.process.wait()
+
+    async def play_game(self, pools, opening, time_limit):
+        """Play one game between two agent pools from an opening.
+
+        Returns
+        -------
+        (int, list<(int, int)>, str)
+            The index of the winning pool, the move history after the
+            opening, and the reason the game ended (as in `Board.play()`).
+        """
+        game = Board(0, 1)
+        for move in opening:
+            game.apply_move(move)
+        history = []
+        while True:
+            active = game.active_player
+            legal_moves = game.get_legal_moves()
+            move = await pools[active].request_move(game, active, time_limit)
+            if move is None:
+                return game.inactive_player, history, "timeout"
+            if move not in legal_moves:
+                if legal_moves:
+                    return game.inactive_player, history, "forfeit"
+                return game.inactive_player, history, "illegal move"
+            history.append(move)
+            game.apply_move(move)
+
+
+async def play_matches(spec_1, spec_2, num_matches, time_limit, workers, concurrency):
+    """Play fair matches (each opening from both sides) between two agents.
+
+    Returns
+    -------
+    (list<int>, dict)
+        The number of wins of each agent and the count of each kind of
+        game termination.
+    """
+    server = MatchServer()
+    await server.start()
+    pools = [AgentPool(server, spec, workers) for spec in (spec_1, spec_2)]
+    try:
+        for pool in pools:
+            await pool.start()
+
+        wins = [0, 0]
+        terminations = {}
+        slots = asyncio.Semaphore(concurrency)
+
+        async def play(first, opening):
+            async with slots:
+                order = (pools[first], pools[1 - first])
+                winner, _, termination = await server.play_game(order, opening, time_limit)
+            winner = first if winner == 0 else 1 - first
+            wins[winner] += 1
+            terminations[termination] = terminations.get(termination, 0) + 1
+
+        games = []
+        for _ in range(num_matches):
+            board = Board(0, 1)
+            opening = []
+            for _ in range(2):
+                opening.append(random.choice(board.get_legal_moves()))
+                board.apply_move(opening[-1])
+            games.extend([play(0, opening), play(1, opening)])
+        await asyncio.gather(*games)
+        return wins, terminations
+    finally:
+        for pool in pools:
+            await pool.stop()
+        await server.close()
+
+
+def main(args):
+    loop = asyncio.new_event_loop()
+    try:
+        start = timeit.default_timer()
+        wins, terminations = loop.run_until_complete(play_matches(
+            args.agent_1, args.agent_2, args.num_matches, args.time_limit,
+            args.workers, args.concurrency))
+        elapsed = timeit.default_timer() - start
+    finally:
+        loop.close()
+    total = sum(wins)
+    print("{:^15}{:^10}{:^10}".format("Agent", "Won", "Win Rate"))
+    for spec, won in zip((args.agent_1, args.agent_2), wins):
+        print("{:^15}{:^10}{:^10.1f}".format(spec[:14], won, 100. * won / total))
+    print("\n{} games in {:.1f}s; terminations: {}".format(
+        total, elapsed, ", ".join("{} {}".format(n, t) for t, n in sorted(terminations.items()))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Isolation matches " +
+        "between agents running in separate worker processes.")
+    parser.add_argument('agent_1', nargs="?",
+                        help="Agent name ({}) or module:callable.".format(", ".join(AGENTS)))
+    parser.add_argument('agent_2', nargs="?", help="The opponent, as agent_1.")
+    parser.add_argument('-n', '--num-matches', type=int, default=10,
+                        help="Number of fair matches (two games each) to play.")
+    parser.add_argument('-t', '--time-limit', type=int, default=TIME_LIMIT,
+                        help="Milliseconds per move (default {}).".format(TIME_LIMIT))
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes per agent (default 1).")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Games played at the same time (default 4).")
+    parser.add_argument('--worker', metavar="SPEC", help=argparse.SUPPRESS)
+    parser.add_argument('--address', help=argparse.SUPPRESS)
+    parser.add_argument('--worker-id', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        address = args.address
+        if os.path.sep not in address:
+            host, _, port = address.rpartition(":")
+            address = (host, int(port))
+        run_worker(args.worker, address, args.worker_id)
+    elif args.agent_1 and args.agent_2:
+        main(args)
+    else:
+        parser.print_help()
@@ -0,0 +1,160 @@
+"""Count the leaf nodes of the Isolation game tree to a fixed depth ("perft",
+as used to validate chess move generators) and time the move generator.
+
+The counts only depend on the rules of the game, so any alternative board
+engine must reproduce the counts of the reference `isolation.Board` exactly
+for every position and depth.  Running the script with the `--alt` flag
+compares the node counts and the speed of both implementations, e.g.:
+
+    python perft.py -d 4 --alt my_board:FastBoard
+    python perft.py -d 3 --opening 2,3 0,5 --divide
+
+Alternative implementations must accept the same constructor arguments as
+`isolation.Board` and provide `get_legal_moves()`, `apply_move()` and
+`forecast_move()` with the same semantics.
+"""
+import argparse
+import importlib
+import timeit
+
+from isolation import Board
+
+PLAYER_1 = "Player1"
+PLAYER_2 = "Player2"
+
+
+def perft(board, depth, bulk=True):
+    """Count the positions reachable from the board in exactly `depth` plies.
+
+    Positions where the active player runs out of moves before the requested
+    depth is reached are terminal and do not contribute to the count.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        The position at the root of the tree; it is not modified.
+
+    depth : int
+        The number of plies to expand below the root.
+
+    bulk : bool (optional)
+        If True, the last ply is counted from the length of the legal move
+        list instead of creating and visiting every leaf board.
+
+    Returns
+    -------
+    int
+        The number of leaf nodes at the requested depth.
+    """
+    if depth == 0:
+        return 1
+    moves = board.get_legal_moves()
+    if bulk and depth == 1:
+        return len(moves)
+    return sum(perft(board.forecast_move(m), depth - 1, bulk) for m in moves)
+
+
+def divide(board, depth, bulk=True):
+    """Return the perft count below each legal move of the root position.
+
+    Splitting the total by root move is the usual way to find the position
+    where two move generators disagree: compare the per-move counts, then
+    repeat on the first mismatching child with one ply less.
+
+    Returns
+    -------
+    list<((int, int), int)>
+        The (move, count) pairs sorted by move.
+    """
+    if depth < 1:
+        raise ValueError("divide requires a depth of at least one ply")
+    return [(m, perft(board.forecast_move(m), depth - 1, bulk))
+            for m in sorted(board.get_legal_moves())]
+
+
+def load_board_class(spec):
+    """Import a board class given as "module:ClassName". """
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError("board class must be given as module:ClassName")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def new_board(board_cls, width, height, opening=()):
+    """Create a board of the given class and apply the opening moves. """
+    board = board_cls(PLAYER_1, PLAYER_2, width=width, height=height)
+    for move in opening:
+        board.apply_move(move)
+    return board
+
+
+def timed_perft(board, depth, bulk=True):
+    """Return the perft count and the elapsed wall time in seconds. """
+    start = timeit.default_timer()
+    nodes = perft(board, depth, bulk)
+    return nodes, timeit.default_timer() - start
+
+
+def parse_move(text):
+    row, col = text.split(",")
+    return int(row), int(col)
+
+
+def main(args):
+    engines = [("reference", Board)]
+    if args.alt:
+        engines.append((args.alt, load_board_class(args.alt)))
+
+    boards = [(name, new_board(cls, args.width, args.height, args.opening))
+              for name, cls in engines]
+
+    if args.divide:
+        per_move = [dict(divide(board, args.depth, not args.no_bulk))
+                    for _, board in boards]
+        moves = sorted(set().union(*per_move))
+        print("{:^10}".format("Move") +
+              "".join("{:>14}".format(name[:13]) for name, _ in boards))
+        for move in moves:
+            counts = [counts.get(move) for counts in per_move]
+            flag = "" if len(set(counts)) == 1 else "  <-- mismatch"
+            print("{!s:^10}".format(move) +
+                  "".join("{!s:>14}".format(c) for c in counts) + flag)
+        print()
+
+    print("{:^7}{:>14}".format("Depth", "Nodes") +
+          "".join("{:>14}".format(name[:13]) for name, _ in boards) +
+          "{:>10}".format("Speedup") * (len(boards) > 1))
+    for depth in range(1, args.depth + 1):
+        results = [timed_perft(board, depth, not args.no_bulk)
+                   for _, board in boards]
+        counts = {nodes for nodes, _ in results}
+        line = "{:^7}{:>14}".format(depth, results[0][0])
+        line += "".join("{:>13.3f}s".format(t) for _, t in results)
+        if len(boards) > 1:
+            line += "{:>9.2f}x".format(results[0][1] / max(results[1][1], 1e-9))
+        if len(counts) > 1:
+            line += "  <-- mismatch: {}".format(
+                ", ".join(str(nodes) for nodes, _ in results))
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count and time the leaf " +
+        "nodes of the Isolation game tree to validate board implementations.")
+    parser.add_argument('-d', '--depth', type=int, default=3,
+                        help="Maximum number of plies to expand (default 3).")
+    parser.add_argument('--width', type=int, default=7,
+                        help="Number of board columns (default 7).")
+    parser.add_argument('--height', type=int, default=7,
+                        help="Number of board rows (default 7).")
+    parser.add_argument('--opening', nargs="+", type=parse_move, default=[],
+                        metavar="ROW,COL",
+                        help="Moves applied to the empty board before counting.")
+    parser.add_argument('--alt', metavar="MODULE:CLASS",
+                        help="Alternative board implementation to compare " +
+                             "against the reference isolation.Board.")
+    parser.add_argument('--divide', action="store_true",
+                        help="Print the node count below each root move.")
+    parser.add_argument('--no-bulk', action="store_true",
+                        help="Visit every leaf instead of bulk counting the last ply.")
+    main(parser.parse_args())
@@ -0,0 +1,238 @@
+"""Persistent store of tournament game results.
+
+A seeded tournament game is fully determined by the two agents, the time
+limit, the position after the random opening and the seed of the board's
+move ordering (apart from how deep the iterative deepening agents get before
+their timers expire).  `tournament.py --seed N` looks every game up in this
+store before playing it, so rerunning a tournament after changing one agent
+only replays the pairings that involve that agent.
+
+Agents are identified by a fingerprint of the source of their class and
+their heuristic, of the functions, classes and constants of this project
+that these reference (directly or through other helpers), of the game
+engine, and of their search parameters; editing any of these changes the
+fingerprint, and the old results are simply never looked up again.  Edits
+to code an agent does not use (e.g., another `custom_score` variant in the
+same module) keep its results.  Delete the database file to start over.
+"""
+import ast
+import dis
+import hashlib
+import importlib
+import inspect
+import os
+import sqlite3
+import sys
+import types
+
+RESULT_CACHE = "tournament_results.db"
+
+SEARCH_PARAMETERS = ["search_depth", "TIMER_THRESHOLD", "use_extensions",
+                     "use_reductions"]
+
+# modules whose source is part of every fingerprint
+ENGINE_MODULES = ["isolation.isolation"]
+
+_PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+# function or class -> source parts of it and its dependencies
+_DEPENDENCY_SOURCES = {}
+# module -> {global name: source of its top-level assignments}
+_ASSIGNMENTS = {}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    player_1 TEXT NOT NULL,
+    player_2 TEXT NOT NULL,
+    time_limit INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    position BLOB NOT NULL,
+    winner INTEGER NOT NULL,
+    termination TEXT NOT NULL,
+    PRIMARY KEY (player_1, player_2, time_limit, seed, position)
+)
+"""
+
+
+def _source(obj):
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return getattr(obj, "__qualname__", repr(obj))
+
+
+def _is_project(obj):
+    """Return True if obj is defined in a module of this project. """
+    path = getattr(inspect.getmodule(obj), "__file__", None)
+    return path is not None and os.path.abspath(path).startswith(_PROJECT_ROOT)
+
+
+def _assignment_source(module, name):
+    """Return the source of the top-level assignments to a global name of
+    a module (e.g., a table of constants), or "" if there are none.
+    """
+    if module not in _ASSIGNMENTS:
+        source = _source(module)
+        assignments = {}
+        try:
+            statements = ast.parse(source).body
+        except SyntaxError:
+            statements = []
+        for node in statements:
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+                targets = [node.target]
+            else:
+                continue
+            segment = ast.get_source_segment(source, node)
+            for target in targets:
+                for target_name in ast.walk(target):
+                    if isinstance(target_name, ast.Name):
+                        assignments[target_name.id] = (
+                            assignments.get(target_name.id, "") + segment + "\n")
+        _ASSIGNMENTS[module] = assignments
+    return _ASSIGNMENTS[module].get(name, "")
+
+
+def _code_objects(obj):
+    """Yield (code, globals) for the function, or for the methods of the
+    class, and for the functions nested in them.
+    """
+    if inspect.isclass(obj):
+        functions = []
+        for value in vars(obj).values():
+            value = getattr(value, "__func__", value)  # staticmethod, classmethod
+            if isinstance(value, property):
+                functions.extend(f for f in (value.fget, value.fset, value.fdel) if f)
+            elif inspect.isfunction(value):
+                functions.append(value)
+    else:
+        functions = [obj]
+    for function in functions:
+        stack = [function.__code__]
+        while stack:
+            code = stack.pop()
+            yield code, function.__globals__
+            stack.extend(c for c in code.co_consts if isinstance(c, types.CodeType))
+
+
+def _dependency_sources(root):
+    """Return the source of a function or class and of the project
+    functions, classes (including base classes) and global variables it
+    references, recursively.  Global variables are covered by the source of
+    their assignments, so module-level caches that fill up at run time do
+    not change the result.
+    """
+    if root in _DEPENDENCY_SOURCES:
+        return _DEPENDENCY_SOURCES[root]
+    parts = []
+    seen = set()
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        parts.append(_source(obj))
+        if not _is_project(obj) or inspect.ismodule(obj):
+            continue
+        references = []
+        if inspect.isclass(obj):
+            references.extend(base for base in obj.__bases__ if base is not object)
+        for code, namespace in _code_objects(obj):
+            for instruction in dis.get_instructions(code):
+                name = instruction.argval
+                if instruction.opname not in ("LOAD_GLOBAL", "LOAD_NAME") or name not in namespace:
+                    continue
+                value = namespace[name]
+                if inspect.isfunction(value) or inspect.isclass(value) or inspect.ismodule(value):
+                    # project modules used as namespaces are covered as a whole
+                    references.append(value)
+                elif (namespace["__name__"], name) not in seen:
+                    seen.add((namespace["__name__"], name))
+                    module = sys.modules[namespace["__name__"]]
+                    parts.append(_assignment_source(module, name) or
+                                 "{}: {}".format(name, type(value).__qualname__))
+        stack.extend(reversed([value for value in references if _is_project(value)]))
+    _DEPENDENCY_SOURCES[root] = parts
+    return parts
+
+
+def fingerprint(player):
+    """Return a hex digest identifying the code and settings of a player.
+
+    The digest covers the player's class name, the source of its class and
+    of its `score` heuristic (if any) together with the project code they
+    reference, the source of the ENGINE_MODULES and the search parameters
+    listed in SEARCH_PARAMETERS.
+    """
+    cls = type(player)
+    parts = ["{}.{}".format(cls.__module__, cls.__qualname__)]
+    parts.extend(_dependency_sources(cls))
+    score_fn = getattr(player, "score", None)
+    if score_fn is not None:
+        # evaluator objects (e.g., learned_eval.LinearEvaluator) are defined
+        # by their class and their attributes (e.g., trained weights)
+        if not inspect.isroutine(score_fn):
+            parts.append(repr(sorted(vars(score_fn).items())))
+            score_fn = type(score_fn)
+        parts.extend(_dependency_sources(score_fn))
+    for name in ENGINE_MODULES:
+        parts.append(_source(importlib.import_module(name)))
+    for name in SEARCH_PARAMETERS:
+        parts.append("{}={!r}".format(name, getattr(player, name, None)))
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """SQLite store of (winner, termination) results for seeded games.
+
+    Parameters
+    ----------
+    path : str (optional)
+        The database file; it is created if it does not exist.
+    """
+
+    def __init__(self, path=RESULT_CACHE):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(_SCHEMA)
+        self._fingerprints = {}
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self._conn.close()
+
+    def _fingerprint(self, player):
+        key = id(player)
+        if key not in self._fingerprints:
+            self._fingerprints[key] = (player, fingerprint(player))
+        return self._fingerprints[key][1]
+
+    def _key(self, game, time_limit, seed):
+        return (self._fingerprint(game._player_1), self._fingerprint(game._player_2),
+                time_limit, seed, game.to_bytes())
+
+    def lookup(self, game, time_limit, seed):
+        """Return the stored (winner, termination) of a game that has not
+        been played yet, or None if it is not in the store.
+        """
+        row = self._conn.execute(
+            "SELECT winner, termination FROM results WHERE player_1 = ? AND "
+            "player_2 = ? AND time_limit = ? AND seed = ? AND position = ?",
+            self._key(game, time_limit, seed)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        winner = game._player_1 if row[0] == 1 else game._player_2
+        return winner, row[1]
+
+    def store(self, game, time_limit, seed, winner, termination):
+        """Record the result of a game, given the board before it was played. """
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._key(game, time_limit, seed) +
+                (1 if winner == game._player_1 else 2, termination))
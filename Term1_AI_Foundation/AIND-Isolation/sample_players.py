@@ -6,8 +6,6 @@ own agent and example heuristic functions.
     ************************************************************************
 """
 
-from random import randint
-
 
 def null_score(game, player):
     """This heuristic presumes no knowledge for non-terminal states, and
@@ -159,7 +157,8 @@ class RandomPlayer():
         legal_moves = game.get_legal_moves()
         if not legal_moves:
             return (-1, -1)
-        return legal_moves[randint(0, len(legal_moves) - 1)]
+        # draw from the game's generator so seeded games are reproducible
+        return legal_moves[game.rng.randint(0, len(legal_moves) - 1)]
 
 
 class GreedyPlayer():
@@ -0,0 +1,252 @@
+"""Profile where `AlphaBetaPlayer` spends its search time.
+
+While attached to a player, the profiler records the number of nodes
+searched at every ply, the index of the move that caused each cutoff and the
+time spent in the heuristic, in move generation and in copying boards.  The
+time is aggregated by call stack, where the stack of a node is the iterative
+deepening depth, the root move above it and the plies between them, e.g.
+
+    depth 4;move (2, 3);ply 2;ply 3;score
+
+and can be exported in the collapsed-stack format read by flame graph tools
+(e.g., `flamegraph.pl search.folded > search.svg` or speedscope):
+
+    python search_profiler.py -n 20 -t 150 -o search.folded
+
+or used from code:
+
+    profiler = SearchProfiler()
+    with profiler.attach(player):
+        player.get_move(game, time_left)
+    print(profiler.summary())
+    profiler.write_collapsed("search.folded")
+"""
+import argparse
+import random
+import timeit
+from contextlib import contextmanager
+
+import game_agent
+import sample_players
+from game_agent import AlphaBetaPlayer
+from isolation import Board
+
+TIME_LIMIT = 150  # number of milliseconds per profiled move
+OPENING_PLIES = 8  # random plies played before each profiled position
+
+
+class SearchProfiler:
+    """Collects node counts, cutoff statistics and timings from the search
+    routines of an `AlphaBetaPlayer`.
+    """
+
+    def __init__(self):
+        self.nodes = {}  # ply -> nodes searched
+        self.cut_nodes = {}  # ply -> nodes that ended with a cutoff
+        self.first_cutoffs = {}  # ply -> cutoffs caused by the first move
+        self.cutoff_index = {}  # ply -> sum of the cutoff move indices
+        self.cutoff_position = {}  # ply -> sum of index / number of moves
+        self.calls = {}  # frame name -> number of calls
+        self.stacks = {}  # collapsed stack -> self time in seconds
+        self._frames = []  # [name, start time, time spent in child frames]
+        self._ply = -1
+
+    def reset(self):
+        self.__init__()
+
+    def _push(self, name):
+        self._frames.append([name, timeit.default_timer(), 0.])
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _pop(self):
+        name, start, child_time = self._frames[-1]
+        elapsed = timeit.default_timer() - start
+        stack = ";".join(frame[0] for frame in self._frames)
+        self.stacks[stack] = self.stacks.get(stack, 0.) + elapsed - child_time
+        self._frames.pop()
+        if self._frames:
+            self._frames[-1][2] += elapsed
+
+    def _timed(self, name, fn):
+        def wrapper(*args, **kwargs):
+            self._push(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._pop()
+        return wrapper
+
+    def _node(self, fn):
+        def wrapper(game, *args, **kwargs):
+            self._ply += 1
+            ply = self._ply
+            self.nodes[ply] = self.nodes.get(ply, 0) + 1
+            if ply == 0:
+                name = "depth {}".format(args[0] if args else kwargs["depth"])
+            elif ply == 1:
+                name = "move {}".format(game.get_player_location(game.inactive_player))
+            else:
+                name = "ply {}".format(ply)
+            self._push(name)
+            try:
+                return fn(game, *args, **kwargs)
+            finally:
+                self._pop()
+                self._ply -= 1
+        return wrapper
+
+    def record_cutoff(self, idx, num_moves):
+        """Called by the search when the move at position idx of the
+        num_moves legal moves of the current node causes a cutoff.
+        """
+        ply = self._ply
+        self.cut_nodes[ply] = self.cut_nodes.get(ply, 0) + 1
+        self.first_cutoffs[ply] = self.first_cutoffs.get(ply, 0) + (idx == 0)
+        self.cutoff_index[ply] = self.cutoff_index.get(ply, 0) + idx
+        self.cutoff_position[ply] = (self.cutoff_position.get(ply, 0.) +
+                                     idx / float(num_moves))
+
+    @contextmanager
+    def attach(self, player):
+        """Profile the searches of player inside a with block.
+
+        The player's search routines and heuristic are wrapped on the
+        instance, and `Board.get_legal_moves` and `Board.copy` are timed for
+        all boards while the block runs.
+        """
+        score = self._timed("score", player.score)
+        if hasattr(player.score, "score_batch"):
+            score.score_batch = self._timed("score", player.score.score_batch)
+        wrapped = {
+            "score": score,
+            "alphabeta": self._node(player.alphabeta),
+            "max_value": self._node(player.max_value),
+            "min_value": self._node(player.min_value),
+        }
+        saved = {name: player.__dict__.get(name) for name in wrapped}
+        board_methods = {"get_legal_moves": "movegen", "copy": "copy"}
+        saved_board = {name: getattr(Board, name) for name in board_methods}
+        for name, fn in wrapped.items():
+            setattr(player, name, fn)
+        for name, frame in board_methods.items():
+            setattr(Board, name, self._timed(frame, saved_board[name]))
+        player.profiler = self
+        try:
+            yield self
+        finally:
+            for name, fn in saved.items():
+                if fn is None:
+                    delattr(player, name)
+                else:
+                    setattr(player, name, fn)
+            for name, fn in saved_board.items():
+                setattr(Board, name, fn)
+            del player.profiler
+            self._frames = []
+            self._ply = -1
+
+    def collapsed_stacks(self):
+        """Return the profile as lines of "frame;frame;... microseconds". """
+        return ["{} {}".format(stack, int(round(1e6 * seconds)))
+                for stack, seconds in sorted(self.stacks.items())
+                if seconds >= 5e-7]
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            for line in self.collapsed_stacks():
+                f.write(line + "\n")
+
+    def summary(self):
+        """Return a text report of the nodes and move-ordering quality per
+        ply and of the time spent in each kind of frame.
+        """
+        lines = ["{:^5}{:>10}{:>10}{:>12}{:>12}{:>12}".format(
+            "Ply", "Nodes", "Cutoffs", "1st move %", "Mean index", "Position %")]
+        for ply in sorted(self.nodes):
+            cuts = self.cut_nodes.get(ply, 0)
+            if cuts:
+                first = "{:.1f}".format(100. * self.first_cutoffs[ply] / cuts)
+                index = "{:.2f}".format(self.cutoff_index[ply] / float(cuts))
+                position = "{:.1f}".format(100. * self.cutoff_position[ply] / cuts)
+            else:
+                first = index = position = "-"
+            lines.append("{:^5}{:>10}{:>10}{:>12}{:>12}{:>12}".format(
+                ply, self.nodes[ply], cuts, first, index, position))
+
+        total = sum(self.stacks.values())
+        by_frame = {}
+        for stack, seconds in self.stacks.items():
+            name = stack.rsplit(";", 1)[-1]
+            if name not in ("score", "movegen", "copy"):
+                name = "search"
+            by_frame[name] = by_frame.get(name, 0.) + seconds
+        lines.append("")
+        lines.append("{:<10}{:>10}{:>10}{:>8}".format("Frame", "Calls", "Seconds", "%"))
+        for name in ("search", "score", "movegen", "copy"):
+            calls = (sum(self.nodes.values()) if name == "search"
+                     else self.calls.get(name, 0))
+            seconds = by_frame.get(name, 0.)
+            lines.append("{:<10}{:>10}{:>10.3f}{:>8.1f}".format(
+                name, calls, seconds, 100. * seconds / max(total, 1e-9)))
+        return "\n".join(lines)
+
+
+def random_position(player_1, player_2, num_plies, rng=random):
+    """Return a board after num_plies random moves, or None if the game
+    ended during the opening.
+    """
+    game = Board(player_1, player_2)
+    for _ in range(num_plies):
+        moves = game.get_legal_moves()
+        if not moves:
+            return None
+        game.apply_move(rng.choice(moves))
+    return game if game.get_legal_moves() else None
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    score_fn = (getattr(game_agent, args.score, None) or
+                getattr(sample_players, args.score))
+    player = AlphaBetaPlayer(score_fn=score_fn)
+    profiler = SearchProfiler()
+    profiled = 0
+    while profiled < args.num_positions:
+        # an even number of opening plies leaves the profiled player to move
+        game = random_position(player, "Opponent", OPENING_PLIES, rng)
+        if game is None:
+            continue
+        with profiler.attach(player):
+            if args.depth:
+                player.time_left = lambda: float("inf")
+                player.alphabeta(game, args.depth, selective=True)
+            else:
+                start = timeit.default_timer()
+                time_left = lambda: args.time_limit - 1000 * (timeit.default_timer() - start)
+                player.get_move(game, time_left)
+        profiled += 1
+
+    print(profiler.summary())
+    if args.output:
+        profiler.write_collapsed(args.output)
+        print("\nWrote collapsed stacks to {}".format(args.output))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the alpha-beta " +
+        "search on random positions and export a flame graph profile.")
+    parser.add_argument('-n', '--num-positions', type=int, default=10,
+                        help="Number of positions to search (default 10).")
+    parser.add_argument('-t', '--time-limit', type=int, default=TIME_LIMIT,
+                        help="Milliseconds per iterative deepening search " +
+                             "(default {}).".format(TIME_LIMIT))
+    parser.add_argument('-d', '--depth', type=int, default=None,
+                        help="Search to a fixed depth instead of using the timer.")
+    parser.add_argument('--score', default="custom_score",
+                        help="Heuristic from game_agent or sample_players " +
+                             "(default custom_score).")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for the random positions.")
+    parser.add_argument('-o', '--output',
+                        help="Path of the collapsed-stack file to write.")
+    main(parser.parse_args())
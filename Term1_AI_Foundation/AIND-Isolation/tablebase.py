@@ -0,0 +1,270 @@
+"""Endgame tablebase for Isolation on small boards (or late positions on the
+standard board) generated by retrograde analysis.
+
+Every move blocks exactly one open cell, so a position with k empty cells
+only leads to positions with k - 1 empty cells.  The generator therefore
+solves the positions layer by layer in order of increasing empty-cell
+count: layer 0 contains only lost positions, and each position in layer k
+is decided by looking up its successors in the finished layer k - 1.
+
+A position is identified by the cell of the player to move (a), the cell of
+the waiting player (b) and the set of empty cells (E), and is stored from
+the point of view of the player to move.  The perfect index of a position
+in its layer is
+
+    (a * (n - 1) + b') * C(n - 2, k) + rank(E)
+
+where b' skips cell a, and rank(E) is the colexicographic rank of E among
+the k-subsets of the n - 2 cells other than a and b.  Each entry is one
+byte, (plies to the end of the game << 1) | win, with the winner playing
+for the fastest and the loser for the slowest finish.
+
+Generate a table, e.g. all 5x5 positions with at most 5 empty cells:
+
+    python tablebase.py --width 5 --height 5 --max-empty 5 -o tb_5x5.bin
+
+and attach it to an agent so its search probes the table instead of
+searching positions with few empty cells:
+
+    player = AlphaBetaPlayer()
+    player.tablebase = Tablebase("tb_5x5.bin")
+"""
+import argparse
+import mmap
+import struct
+import timeit
+
+from game_agent import knight_expand, knight_shifts
+from isolation.isolation import mask_to_cells
+
+MAGIC = b"ISTB"
+HEADER = struct.Struct("<4sBBB")  # magic, width, height, max_empty
+
+
+def binomial_table(n, k):
+    """Return C where C[i][j] is the binomial coefficient i choose j for
+    0 <= i <= n and 0 <= j <= k.
+    """
+    C = [[0] * (k + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        C[i][0] = 1
+        for j in range(1, min(i, k) + 1):
+            C[i][j] = C[i - 1][j - 1] + C[i - 1][j]
+    return C
+
+
+def neighbor_masks(width, height):
+    """Return, for each cell index, the bitmask of the cells one knight move
+    away on an empty board (cells are numbered row + column * height).
+    """
+    shifts = knight_shifts(width, height)
+    return [knight_expand(1 << idx, shifts) for idx in range(width * height)]
+
+
+class TablebaseLayout:
+    """Index arithmetic shared by the generator and the probing code.
+
+    Parameters
+    ----------
+    width, height : int
+        The board dimensions.
+
+    max_empty : int
+        The largest number of empty cells covered by the table.
+    """
+
+    def __init__(self, width, height, max_empty):
+        self.width = width
+        self.height = height
+        self.max_empty = max_empty
+        self.cells = width * height
+        if not 0 <= max_empty <= self.cells - 2:
+            raise ValueError("max_empty must be between 0 and width * height - 2")
+        self.binom = binomial_table(self.cells, max_empty + 1)
+        self.layer_size = [self.cells * (self.cells - 1) * self.binom[self.cells - 2][k]
+                           for k in range(max_empty + 1)]
+        self.layer_offset = [sum(self.layer_size[:k]) for k in range(max_empty + 1)]
+        self.size = sum(self.layer_size)
+
+    def index(self, a, b, empty_cells):
+        """Return the position of an entry in the table.
+
+        Parameters
+        ----------
+        a, b : int
+            The cell indices of the player to move and the waiting player.
+
+        empty_cells : list<int>
+            The empty cell indices in increasing order.
+        """
+        binom = self.binom
+        k = len(empty_cells)
+        rank = 0
+        for i, cell in enumerate(empty_cells):
+            rank += binom[cell - (cell > a) - (cell > b)][i + 1]
+        pair = a * (self.cells - 1) + b - (b > a)
+        return self.layer_offset[k] + pair * binom[self.cells - 2][k] + rank
+
+
+def generate(width, height, max_empty, verbose=False):
+    """Solve every position with at most `max_empty` empty cells.
+
+    Returns
+    -------
+    (TablebaseLayout, bytearray)
+        The table layout and the table entries.
+    """
+    layout = TablebaseLayout(width, height, max_empty)
+    n = layout.cells
+    neighbors = neighbor_masks(width, height)
+    index = layout.index
+    table = bytearray(layout.size)  # layer 0: every position is lost in 0
+
+    for k in range(1, max_empty + 1):
+        start = timeit.default_timer()
+        wins = 0
+        for a in range(n):
+            for b in range(n):
+                if a == b:
+                    continue
+                for empty in _subsets(n, k, a, b):
+                    empty_mask = 0
+                    for cell in empty:
+                        empty_mask |= 1 << cell
+                    moves = neighbors[a] & empty_mask
+                    if not moves:
+                        continue  # no legal moves: lost in 0, already zero
+                    win_plies = loss_plies = None
+                    for move in mask_to_cells(moves):
+                        child = table[index(b, move, [c for c in empty if c != move])]
+                        plies = (child >> 1) + 1
+                        if child & 1:
+                            if loss_plies is None or plies > loss_plies:
+                                loss_plies = plies
+                        elif win_plies is None or plies < win_plies:
+                            win_plies = plies
+                    if win_plies is not None:
+                        wins += 1
+                        table[index(a, b, empty)] = (win_plies << 1) | 1
+                    else:
+                        table[index(a, b, empty)] = loss_plies << 1
+        if verbose:
+            print("{:>6} empty cells: {:>10} positions, {:>10} wins ({:.1f}s)".format(
+                k, layout.layer_size[k], wins, timeit.default_timer() - start))
+    return layout, table
+
+
+def _subsets(n, k, a, b):
+    """Yield the sorted k-subsets of the cells other than a and b. """
+    others = [cell for cell in range(n) if cell != a and cell != b]
+    stack = [(0, [])]
+    while stack:
+        start, chosen = stack.pop()
+        if len(chosen) == k:
+            yield chosen
+            continue
+        for i in range(start, len(others) - (k - len(chosen)) + 1):
+            stack.append((i + 1, chosen + [others[i]]))
+
+
+def save(path, layout, table):
+    """Write a generated table to disk. """
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, layout.width, layout.height, layout.max_empty))
+        f.write(table)
+
+
+class Tablebase:
+    """Read-only access to a table file generated by this module.
+
+    The file is memory-mapped, so opening it is instant and only the pages
+    touched by probes are read from disk.
+
+    Parameters
+    ----------
+    path : str
+        The file written by `save()`.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, width, height, max_empty = HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError("{} is not an Isolation tablebase".format(path))
+        self.layout = TablebaseLayout(width, height, max_empty)
+        if len(self._data) != HEADER.size + self.layout.size:
+            raise ValueError("{} is truncated".format(path))
+
+    @property
+    def max_empty(self):
+        return self.layout.max_empty
+
+    def close(self):
+        self._data.close()
+
+    def covers(self, game):
+        """Return True if the table contains the game position. """
+        # every move blocks one cell, so this counts the empty cells without
+        # building the list of blank spaces at every probe
+        return (game.width == self.layout.width and
+                game.height == self.layout.height and
+                game.move_count >= 2 and
+                game.width * game.height - game.move_count <= self.layout.max_empty)
+
+    def probe(self, game):
+        """Look up the game position.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position to look up.
+
+        Returns
+        -------
+        (bool, int) or None
+            Whether the active player wins and the number of plies until the
+            game ends with optimal play, or None if the position is not in
+            the table.
+        """
+        if not self.covers(game):
+            return None
+        height = game.height
+        r, c = game.get_player_location(game.active_player)
+        a = r + c * height
+        r, c = game.get_player_location(game.inactive_player)
+        b = r + c * height
+        cells = game.width * height
+        empty = mask_to_cells(~game.get_blocked_mask() & ((1 << cells) - 1))
+        entry = self._data[HEADER.size + self.layout.index(a, b, empty)]
+        return bool(entry & 1), entry >> 1
+
+    def score(self, game, player):
+        """Return the exact game value (+inf or -inf) of the position for
+        player, or None if the position is not in the table.
+        """
+        result = self.probe(game)
+        if result is None:
+            return None
+        if result[0] == (player == game.active_player):
+            return float("inf")
+        return float("-inf")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate an Isolation " +
+        "endgame tablebase by retrograde analysis.")
+    parser.add_argument('--width', type=int, default=5,
+                        help="Number of board columns (default 5).")
+    parser.add_argument('--height', type=int, default=5,
+                        help="Number of board rows (default 5).")
+    parser.add_argument('--max-empty', type=int, default=4,
+                        help="Solve positions with up to this many empty cells (default 4).")
+    parser.add_argument('-o', '--output', required=True,
+                        help="Path of the table file to write.")
+    args = parser.parse_args()
+
+    layout, table = generate(args.width, args.height, args.max_empty, verbose=True)
+    save(args.output, layout, table)
+    print("Wrote {} positions ({:.1f} MB) to {}".format(
+        layout.size, (HEADER.size + layout.size) / 2. ** 20, args.output))
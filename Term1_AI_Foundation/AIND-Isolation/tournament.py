@@ -11,13 +11,19 @@ players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
 """
+import argparse
+import hashlib
 import itertools
+import math
+import multiprocessing
 import random
 import warnings
 
 from collections import namedtuple
 
+from game_scheduler import play_games as play_scheduled_games
 from isolation import Board
+from result_cache import RESULT_CACHE, ResultCache, fingerprint
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
@@ -26,6 +32,12 @@ from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 700  # number of milliseconds before timeout
 
+MAX_SPRT_MATCHES = 100  # upper limit of matches per pairing in SPRT mode
+SPRT_ELO_MARGIN = 100  # SPRT decides between -margin and +margin Elo
+SPRT_ALPHA = 0.05  # probability of accepting H1 when H0 is true
+SPRT_BETA = 0.05  # probability of accepting H0 when H1 is true
+ELO_K = 16  # step size of the incremental Elo updates
+
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
 function against a baseline agent using alpha-beta search and iterative
@@ -34,10 +46,100 @@ ID and alpha-beta search with the custom_score functions defined in
 game_agent.py.
 """
 
+SPRT_DESCRIPTION = """
+This script estimates the strength of the test agents with a sequential
+probability ratio test (SPRT): each pairing is played until the results show
+with confidence that the test agent is stronger (H1) or weaker (H0) than its
+opponent by the Elo margin, or until the match limit is reached.  Elo ratings
+are maintained across all agents during the tournament.
+"""
+
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def derive_seed(base_seed, *parts):
+    """Return a 32-bit seed determined by the tournament seed and the parts
+    (e.g., agent fingerprints and the index of the match in the pairing), or
+    None if the tournament is not seeded.
+
+    Deriving every seed from what identifies the game, instead of drawing
+    them from one shared stream, keeps the seeds (and so the cache keys) of
+    a pairing unchanged when other pairings are added, removed or stop after
+    a different number of games.
+    """
+    if base_seed is None:
+        return None
+    key = "\0".join(str(part) for part in (base_seed,) + parts)
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def opening_rng(base_seed, agents, match):
+    """Return the random number generator for the random opening of a match
+    between the agents: seeded with derive_seed() from the tournament seed,
+    the agents' fingerprints and the index of the match, or the global
+    generator if the tournament is not seeded.
+    """
+    if base_seed is None:
+        return random
+    parts = [fingerprint(agent.player) for agent in agents] + [match]
+    return random.Random(derive_seed(base_seed, "opening", *parts))
+
+
+def new_game(agent_1, agent_2, match, base_seed=None):
+    """Create a board for a tournament game. In a seeded tournament the
+    board is seeded from the tournament seed, the fingerprints of the agents
+    in player order and the index of the match in the pairing: the seed
+    fixes the board's move ordering and the choices of random agents (see
+    `Board.rng`), so every game is reproducible on its own, whether or not
+    the other games are played or served from the result cache.  Agents
+    are keyed by fingerprint rather than by name, since names need not be
+    unique (a test agent and a cpu agent are both named "AB_Improved").
+
+    Returns
+    -------
+    (`isolation.Board`, int or None)
+        The board and its seed.
+    """
+    seed = None
+    if base_seed is not None:
+        seed = derive_seed(base_seed, fingerprint(agent_1.player),
+                           fingerprint(agent_2.player), match)
+    return Board(agent_1.player, agent_2.player, seed=seed), seed
+
+
+def play_games(games, cache=None, pool=None):
+    """Play a list of (game, seed) pairs to the end and return the list of
+    (winner, termination) pairs.
+
+    Seeded games are looked up in the result cache first, and the results of
+    the games that had to be played are added to it.  If a pool of worker
+    processes is given, the games are played concurrently in it by
+    `game_scheduler`.
+    """
+    results = [None] * len(games)
+    pending = []
+    for idx, (game, seed) in enumerate(games):
+        if cache is not None and seed is not None:
+            results[idx] = cache.lookup(game, TIME_LIMIT, seed)
+        if results[idx] is None:
+            pending.append(idx)
+
+    starts = [games[idx][0].copy() for idx in pending]
+    if pool is not None:
+        played = play_scheduled_games([games[idx][0] for idx in pending],
+                                      TIME_LIMIT, pool=pool)
+    else:
+        played = [games[idx][0].play(time_limit=TIME_LIMIT) for idx in pending]
+
+    for idx, start, (winner, _, termination) in zip(pending, starts, played):
+        results[idx] = winner, termination
+        if cache is not None and games[idx][1] is not None:
+            cache.store(start, TIME_LIMIT, games[idx][1], winner, termination)
+    return results
+
+
+def play_round(cpu_agent, test_agents, win_counts, num_matches, seed=None,
+               cache=None, pool=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
@@ -46,21 +148,22 @@ def play_round(cpu_agent, test_agents, win_counts, num_matches):
     """
     timeout_count = 0
     forfeit_count = 0
-    for _ in range(num_matches):
+    for match in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
+        games = sum([[new_game(cpu_agent, agent, match, seed),
+                      new_game(agent, cpu_agent, match, seed)]
                     for agent in test_agents], [])
 
-        # initialize all games with a random move and response
+        # initialize all games with a random move and response, shared by
+        # all the test agents
+        rng = opening_rng(seed, [cpu_agent], match)
         for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
+            move = rng.choice(games[0][0].get_legal_moves())
+            for game, _ in games:
                 game.apply_move(move)
 
         # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
+        for winner, termination in play_games(games, cache, pool):
             win_counts[winner] += 1
 
         if termination == "timeout":
@@ -77,7 +180,8 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
+def play_matches(cpu_agents, test_agents, num_matches, seed=None, cache=None,
+                 pool=None):
     """Play matches between the test agent and each cpu_agent individually. """
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
@@ -99,7 +203,8 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        counts = play_round(agent, test_agents, wins, num_matches, seed, cache,
+                            pool)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
@@ -126,7 +231,179 @@ def play_matches(cpu_agents, test_agents, num_matches):
                "legal moves available to play.\n").format(total_forfeits))
 
 
-def main():
+def elo_win_probability(elo_diff):
+    """Return the expected score of a player rated `elo_diff` points higher
+    than the opponent.
+    """
+    return 1. / (1. + 10 ** (-elo_diff / 400.))
+
+
+def update_elo(ratings, winner, loser, k=ELO_K):
+    """Apply an incremental Elo update to the ratings dict after one game. """
+    expected = elo_win_probability(ratings[winner] - ratings[loser])
+    ratings[winner] += k * (1. - expected)
+    ratings[loser] -= k * (1. - expected)
+
+
+def bayes_elo(results, agents, prior=1., iterations=100):
+    """Estimate maximum a posteriori Elo ratings from pairwise game results.
+
+    The ratings are fit with the minorization-maximization algorithm for the
+    Bradley-Terry model used by BayesElo, with `prior` virtual wins added in
+    each direction between every pair of opponents so that undefeated (or
+    winless) agents still receive finite ratings.
+
+    Parameters
+    ----------
+    results : dict
+        Maps (winner, loser) pairs to the number of games won by winner.
+
+    agents : list
+        The agents to rate; ratings are centered on a mean of zero.
+
+    Returns
+    -------
+    dict
+        The Elo rating of each agent.
+    """
+    wins = {a: 0. for a in agents}
+    games = {a: {} for a in agents}
+    for (a, b), n in results.items():
+        wins[a] += n
+        games[a][b] = games[a].get(b, 0) + n
+        games[b][a] = games[b].get(a, 0) + n
+    for a in agents:
+        for b in games[a]:
+            wins[a] += prior
+            games[a][b] += 2 * prior
+
+    gamma = {a: 1. for a in agents}
+    for _ in range(iterations):
+        for a in agents:
+            if games[a]:
+                gamma[a] = wins[a] / sum(n / (gamma[a] + gamma[b])
+                                         for b, n in games[a].items())
+        scale = math.exp(sum(math.log(g) for g in gamma.values()) / len(gamma))
+        gamma = {a: g / scale for a, g in gamma.items()}
+    return {a: 400. * math.log10(g) for a, g in gamma.items()}
+
+
+def sprt_llr(wins, losses, elo0, elo1):
+    """Return the log-likelihood ratio of H1 (the Elo difference is elo1)
+    versus H0 (the difference is elo0) given the game results.  Isolation
+    games cannot be drawn, so each game is a Bernoulli trial.
+    """
+    p0 = elo_win_probability(elo0)
+    p1 = elo_win_probability(elo1)
+    return wins * math.log(p1 / p0) + losses * math.log((1 - p1) / (1 - p0))
+
+
+def sprt_bounds(alpha=SPRT_ALPHA, beta=SPRT_BETA):
+    """Return the (lower, upper) LLR bounds that accept H0 and H1. """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def play_fair_pair(agent_1, agent_2, match, seed=None, cache=None, pool=None):
+    """Play two games from the same random opening, swapping the initiative,
+    and return the list of (winner, loser, termination) tuples.
+    """
+    games = [new_game(agent_1, agent_2, match, seed),
+             new_game(agent_2, agent_1, match, seed)]
+    rng = opening_rng(seed, [agent_1, agent_2], match)
+    for _ in range(2):
+        move = rng.choice(games[0][0].get_legal_moves())
+        for game, _ in games:
+            game.apply_move(move)
+
+    outcomes = []
+    for winner, termination in play_games(games, cache, pool):
+        if winner == agent_1.player:
+            outcomes.append((agent_1, agent_2, termination))
+        else:
+            outcomes.append((agent_2, agent_1, termination))
+    return outcomes
+
+
+def play_sprt_pairing(cpu_agent, test_agent, ratings, results, max_matches,
+                      elo_margin=SPRT_ELO_MARGIN, seed=None, cache=None,
+                      pool=None):
+    """Play fair pairs of games between the agents until the SPRT accepts
+    either hypothesis or `max_matches` pairs have been played.
+
+    Returns
+    -------
+    (int, int, str, float, int, int)
+        The test agent wins and losses, the accepted hypothesis ("H1" when
+        the test agent is stronger, "H0" when it is weaker, "--" when the
+        test was inconclusive), the final LLR, and the number of timeouts
+        and forfeits.
+    """
+    lower, upper = sprt_bounds()
+    wins = losses = timeouts = forfeits = 0
+    llr = 0.
+    for match in range(max_matches):
+        for winner, loser, termination in play_fair_pair(test_agent, cpu_agent, match,
+                                                          seed, cache, pool):
+            update_elo(ratings, winner, loser)
+            results[(winner, loser)] = results.get((winner, loser), 0) + 1
+            if winner == test_agent:
+                wins += 1
+            else:
+                losses += 1
+                if termination == "timeout":
+                    timeouts += 1
+                elif termination == "forfeit":
+                    forfeits += 1
+        llr = sprt_llr(wins, losses, -elo_margin, elo_margin)
+        if llr >= upper:
+            return wins, losses, "H1", llr, timeouts, forfeits
+        if llr <= lower:
+            return wins, losses, "H0", llr, timeouts, forfeits
+    return wins, losses, "--", llr, timeouts, forfeits
+
+
+def play_sprt_matches(cpu_agents, test_agents, max_matches, seed=None,
+                      cache=None, pool=None):
+    """Play every test agent against each cpu_agent with early stopping and
+    report the SPRT decisions and the Elo ratings of all agents.
+    """
+    agents = cpu_agents + test_agents
+    ratings = {agent: 0. for agent in agents}
+    results = {}
+    total_timeouts = total_forfeits = 0
+
+    print("\n{:^13}{:^13}{:^11}{:^9}{:^8}".format(
+        "Test Agent", "Opponent", "Won | Lost", "Result", "LLR"))
+    for cpu_agent in cpu_agents:
+        for test_agent in test_agents:
+            print("{:^13}{:^13}".format(test_agent.name, cpu_agent.name),
+                  end="", flush=True)
+            won, lost, decision, llr, timeouts, forfeits = play_sprt_pairing(
+                cpu_agent, test_agent, ratings, results, max_matches, seed=seed,
+                cache=cache, pool=pool)
+            total_timeouts += timeouts
+            total_forfeits += forfeits
+            print("{:>4} | {:<4}{:^9}{:^8.2f}".format(won, lost, decision, llr))
+
+    ml_ratings = bayes_elo(results, agents)
+    print("-" * 54)
+    print("{:^15}{:^13}{:^13}{:^13}".format("Agent", "Role", "Elo", "BayesElo"))
+    for agent in sorted(agents, key=lambda a: -ml_ratings[a]):
+        role = "test" if agent in test_agents else "cpu"
+        print("{:^15}{:^13}{:^13.0f}{:^13.0f}".format(
+            agent.name, role, ratings[agent], ml_ratings[agent]))
+
+    if total_timeouts:
+        print(("\nThere were {} timeouts during the tournament -- make sure " +
+               "your agent handles search timeout correctly, and consider " +
+               "increasing the timeout margin for your agent.\n").format(
+            total_timeouts))
+    if total_forfeits:
+        print(("\nYour ID search forfeited {} games while there were still " +
+               "legal moves available to play.\n").format(total_forfeits))
+
+
+def main(args):
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
@@ -148,12 +425,66 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
     ]
 
-    print(DESCRIPTION)
+    # A seed makes the openings, the move ordering of every board and the
+    # choices of random agents reproducible (each game has its own seeded
+    # generator); iterative deepening agents still depend on timing.
+    # Seeded games are served from the result cache when both agents and
+    # the time limit are unchanged since the game was last played.
+    cache = None
+    if args.seed is not None and not args.no_cache:
+        cache = ResultCache(args.cache)
+
+    # one pool of worker processes serves every round of the tournament
+    pool = None
+    if args.processes:
+        pool = multiprocessing.Pool(args.processes)
+
+    print(SPRT_DESCRIPTION if args.sprt else DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    try:
+        if args.sprt:
+            play_sprt_matches(cpu_agents, test_agents,
+                              args.num_matches or MAX_SPRT_MATCHES, args.seed, cache,
+                              pool)
+        else:
+            play_matches(cpu_agents, test_agents, args.num_matches or NUM_MATCHES,
+                         args.seed, cache, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if cache is not None:
+        print("{} games played, {} results reused from {}".format(
+            cache.misses, cache.hits, cache.path))
+        cache.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Play a round-robin " +
+        "tournament between the test agents and the cpu agents.")
+    parser.add_argument('--sprt', action="store_true",
+                        help="Stop each pairing as soon as a sequential " +
+                             "probability ratio test decides the result, and " +
+                             "report Elo ratings for all agents.")
+    parser.add_argument('-n', '--num-matches', type=int, default=None,
+                        help="Number of fair matches per pairing (the upper " +
+                             "limit in SPRT mode). Default: {} ({} with --sprt)."
+                             .format(NUM_MATCHES, MAX_SPRT_MATCHES))
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed the openings and the move ordering of " +
+                             "every game for reproducible runs. Seeded " +
+                             "results are cached and reused across runs.")
+    parser.add_argument('--cache', default=RESULT_CACHE,
+                        help="Result cache file (default {})."
+                             .format(RESULT_CACHE))
+    parser.add_argument('--no-cache', action="store_true",
+                        help="Play every game even if its result is cached.")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Play the games of each round concurrently in " +
+                             "a pool of this many worker processes, started " +
+                             "once for the tournament, with per-game virtual " +
+                             "clocks.")
+    main(parser.parse_args())
@@ -52,6 +52,13 @@ class Problem:
         else:
             return state == self.goal
 
+    def goal_count(self, state):
+        """Return the number of goal conditions the state does not satisfy,
+        for goal-counting heuristics. The default method returns 0 for goal
+        states and 1 otherwise; problems with conjunctive goals should
+        override it with a cheaper exact count."""
+        return 0 if self.goal_test(state) else 1
+
     def path_cost(self, c, state1, action, state2):
         """Return the cost of a solution path that arrives at state2 from
         state1 via action, assuming cost c to get up to state1. If the problem
@@ -133,6 +140,11 @@ class Node:
 # Uninformed Search algorithms
 
 
+def node_state(node):
+    "The key of a node in a FIFOQueue frontier: its state."
+    return node.state
+
+
 def tree_search(problem, frontier):
     """Search through the successors of a problem to find a goal.
     The argument frontier should be an empty queue.
@@ -183,14 +195,14 @@ def breadth_first_search(problem):
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = FIFOQueue()
+    frontier = FIFOQueue(key=node_state)
     frontier.append(node)
     explored = set()
     while frontier:
         node = frontier.pop()
         explored.add(node.state)
         for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
+            if child.state not in explored and not frontier.contains_key(child.state):
                 if problem.goal_test(child.state):
                     return child
                 frontier.append(child)
@@ -204,12 +216,14 @@ def best_first_graph_search(problem, f):
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    Nodes with equal f scores are ordered by problem.goal_count(), so the
+    search expands the node that satisfies the most goals first."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = PriorityQueue(min, f)
+    frontier = PriorityQueue(min, lambda n: (f(n), problem.goal_count(n.state)))
     frontier.append(node)
     explored = set()
     while frontier:
@@ -218,13 +232,10 @@ def best_first_graph_search(problem, f):
             return node
         explored.add(node.state)
         for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
+            # appending keeps the cheaper of child and a frontier node with
+            # the same state
+            if child.state not in explored:
                 frontier.append(child)
-            elif child in frontier:
-                incumbent = frontier[child]
-                if f(child) < f(incumbent):
-                    # del frontier[incumbent]
-                    frontier.append(child)
     return None
 
 
@@ -339,6 +350,9 @@ class InstrumentedProblem(Problem):
             self.found = state
         return result
 
+    def goal_count(self, state):
+        return self.problem.goal_count(state)
+
     def path_cost(self, c, state1, action, state2):
         return self.problem.path_cost(c, state1, action, state2)
 
@@ -10,7 +10,6 @@ import random
 import math
 
 import heapq
-from collections import defaultdict
 
 # ______________________________________________________________________________
 # Functions on Sequences and Iterables
@@ -549,31 +548,43 @@ def Stack():
 
 class FIFOQueue(Queue):
 
-    """A First-In-First-Out Queue."""
+    """A First-In-First-Out Queue.
 
-    def __init__(self):
-        self.A = []
-        self.start = 0
+    MODIFIED FROM AIMA VERSION
+        - Use collections.deque
+        - Count the keys of the queued items (the items themselves, or
+          key(item) if a key function is given) in a dict, so that
+          membership tests take constant time instead of scanning the queue
+    """
+
+    def __init__(self, key=None):
+        self.A = collections.deque()
+        self.key = key
+        self._keys = {}  # key -> number of queued items with that key
 
     def append(self, item):
         self.A.append(item)
+        k = item if self.key is None else self.key(item)
+        self._keys[k] = self._keys.get(k, 0) + 1
 
     def __len__(self):
-        return len(self.A) - self.start
-
-    def extend(self, items):
-        self.A.extend(items)
+        return len(self.A)
 
     def pop(self):
-        e = self.A[self.start]
-        self.start += 1
-        if self.start > 5 and self.start > len(self.A) / 2:
-            self.A = self.A[self.start:]
-            self.start = 0
+        e = self.A.popleft()
+        k = e if self.key is None else self.key(e)
+        if self._keys[k] == 1:
+            del self._keys[k]
+        else:
+            self._keys[k] -= 1
         return e
 
     def __contains__(self, item):
-        return item in self.A[self.start:]
+        return (item if self.key is None else self.key(item)) in self._keys
+
+    def contains_key(self, k):
+        """Is an item with key k in the queue?"""
+        return k in self._keys
 
 
 class PriorityQueue(Queue):
@@ -583,32 +594,59 @@ class PriorityQueue(Queue):
     MODIFIED FROM AIMA VERSION
         - Use heapq
         - Use an additional dict to track membership
-        - remove __delitem__ (AIMA version contains error)
+        - Items are unique: appending an item equal to one already in the
+          queue keeps whichever of the two has the better (lower) f, and
+          del q[item] removes it, so del followed by append replaces an
+          item unconditionally.  Replaced and removed entries stay in the
+          heap until they are popped (lazy deletion) or the heap is
+          compacted because most of it is stale.
     """
 
     def __init__(self, order=None, f=lambda x: x):
         self.A = []
-        self._A = defaultdict(lambda: 0)
+        self._A = {}  # item -> its live (f(item), item) entry in the heap
         self.f = f
 
     def append(self, item):
-        heapq.heappush(self.A, (self.f(item), item))
-        self._A[item] += 1
+        entry = (self.f(item), item)
+        incumbent = self._A.get(item)
+        if incumbent is not None and incumbent[0] <= entry[0]:
+            return
+        self._A.pop(item, None)
+        self._A[item] = entry
+        heapq.heappush(self.A, entry)
+        self._compact()
 
     def __len__(self):
-        return len(self.A)
+        return len(self._A)
 
     def pop(self):
-        _, item = heapq.heappop(self.A)
-        self._A[item] -= 1
-        return item
+        while self.A:
+            entry = heapq.heappop(self.A)
+            item = entry[1]
+            if self._A.get(item) is entry:
+                del self._A[item]
+                return item
+        raise IndexError('pop from an empty priority queue')
 
     def __contains__(self, item):
-        return self._A[item] > 0
+        return item in self._A
 
     def __getitem__(self, key):
-        if self._A[key] > 0:
-            return key
+        entry = self._A.get(key)
+        if entry is not None:
+            return entry[1]
+
+    def __delitem__(self, key):
+        del self._A[key]
+        self._compact()
+
+    def _compact(self):
+        # rebuild the heap from the live entries once they are outnumbered
+        # by stale ones, so the heap stays within twice the queue size
+        if len(self.A) > 32 and len(self.A) > 2 * len(self._A):
+            self.A = list(self._A.values())
+            heapq.heapify(self.A)
 
 # ______________________________________________________________________________
 # Useful Shorthands
@@ -0,0 +1,152 @@
+"""State-keyed cache for heuristic values.
+
+`functools.lru_cache` on a heuristic method keys the cache on `self` and the
+search `Node`, so it keeps every cached node alive (and, through the parent
+links, the search tree above it) for as long as the problem exists, and it is
+capped at an arbitrary number of entries.  A heuristic only depends on the
+node's state, so the caches here are keyed by the encoded state string and
+live on the problem, one per heuristic:
+
+    class MyProblem(Problem):
+        @cached_heuristic
+        def h_something(self, node):
+            ...
+
+The size, eviction policy and memory bound of the caches are set per problem
+with `configure_heuristic_cache(problem, ...)`, and `cache_report(problem)`
+returns the hit-rate and memory statistics that run_search.py prints.
+"""
+import sys
+from collections import OrderedDict
+from functools import wraps
+
+DEFAULT_MAXSIZE = 100000
+POLICIES = ("lru", "fifo")
+# approximate size of an OrderedDict entry besides its key and value
+ENTRY_OVERHEAD = 100
+
+_MISSING = object()
+
+
+class HeuristicCache():
+    """Bounded mapping from encoded states to heuristic values
+
+    :param maxsize: int maximum number of entries, None for no limit, 0 to disable caching
+    :param policy: str eviction policy, "lru" (least recently used) or "fifo" (oldest entry)
+    :param max_memory: int maximum approximate memory in bytes, None for no limit
+    Instance variables calculated:
+        hits, misses, evictions: int counters
+        memory: int approximate bytes held by the entries
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, policy="lru", max_memory=None):
+        if policy not in POLICIES:
+            raise ValueError("unknown eviction policy {!r}, expected one of {}".format(
+                policy, ", ".join(POLICIES)))
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_memory = max_memory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, state: str, default=None):
+        """ return the cached value of the state, or default if it is not cached """
+        value = self.entries.get(state, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self.policy == "lru":
+            self.entries.move_to_end(state)
+        return value
+
+    def put(self, state: str, value):
+        """ cache the value of the state, evicting entries to stay within the bounds """
+        if self.maxsize == 0 or state in self.entries:
+            return
+        self.entries[state] = value
+        self.memory += self.entry_size(state, value)
+        while self.entries and (
+                (self.maxsize is not None and len(self.entries) > self.maxsize) or
+                (self.max_memory is not None and self.memory > self.max_memory)):
+            old_state, old_value = self.entries.popitem(last=False)
+            self.memory -= self.entry_size(old_state, old_value)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.memory = 0
+
+    @staticmethod
+    def entry_size(state, value) -> int:
+        return sys.getsizeof(state) + sys.getsizeof(value) + ENTRY_OVERHEAD
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def __repr__(self):
+        return '{:^10d}  {:^10d}  {:^10.1%}  {:^10d}  {:^10d}  {:^10.1f}'.format(
+            self.hits, self.misses, self.hit_rate, len(self.entries),
+            self.evictions, self.memory / 1024)
+
+
+def heuristic_caches(problem) -> dict:
+    """ return the dict of heuristic name -> HeuristicCache of a problem """
+    caches = problem.__dict__.get('heuristic_caches')
+    if caches is None:
+        caches = problem.heuristic_caches = {}
+    return caches
+
+
+def configure_heuristic_cache(problem, maxsize=DEFAULT_MAXSIZE, policy="lru", max_memory=None):
+    """ set the bounds of the heuristic caches of a problem, dropping any cached values
+
+    :param problem: Problem whose heuristics use cached_heuristic
+    :param maxsize: int maximum number of entries per heuristic, None for no limit, 0 to disable
+    :param policy: str eviction policy, one of POLICIES
+    :param max_memory: int maximum approximate bytes per heuristic, None for no limit
+    """
+    # validate the options before replacing the caches
+    HeuristicCache(maxsize, policy, max_memory)
+    problem.heuristic_cache_options = dict(maxsize=maxsize, policy=policy,
+                                           max_memory=max_memory)
+    heuristic_caches(problem).clear()
+
+
+def cached_heuristic(method):
+    """ decorator caching a heuristic method h(self, node) by node.state on the problem """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, node):
+        caches = heuristic_caches(self)
+        cache = caches.get(name)
+        if cache is None:
+            options = getattr(self, 'heuristic_cache_options', {})
+            cache = caches[name] = HeuristicCache(**options)
+        value = cache.get(node.state, _MISSING)
+        if value is _MISSING:
+            value = method(self, node)
+            cache.put(node.state, value)
+        return value
+    return wrapper
+
+
+def cache_report(problem) -> str:
+    """ return a table of the statistics of the heuristic caches of a problem, or "" if none was used """
+    caches = problem.__dict__.get('heuristic_caches')
+    if not caches:
+        return ""
+    lines = ["{:<24}{:^10}  {:^10}  {:^10}  {:^10}  {:^10}  {:^10}".format(
+        "Heuristic cache", "Hits", "Misses", "Hit rate", "Entries", "Evictions", "KB")]
+    for name, cache in sorted(caches.items()):
+        lines.append("{:<24}{!r}".format(name, cache))
+    return "\n".join(lines)
@@ -42,8 +42,9 @@ def encode_state(fs: FluentState, fluent_map: list) -> str:
     :return: str eg. "TFFTFT" string of mapped positive and negative fluents
     """
     state_tf = []
+    pos = set(fs.pos)
     for fluent in fluent_map:
-        if fluent in fs.pos:
+        if fluent in pos:
             state_tf.append('T')
         else:
             state_tf.append('F')
@@ -66,3 +67,132 @@ def decode_state(state: str, fluent_map: list) -> FluentState:
         else:
             fs.neg.append(fluent_map[idx])
     return fs
+
+
+# translation tables between T/F state strings and binary digit strings
+_TF_TO_BITS = str.maketrans("TF", "10")
+_BITS_TO_TF = str.maketrans("10", "TF")
+
+
+def fluent_index(fluent_map: list) -> dict:
+    """ map each fluent to its position (bit number) in the state encoding
+
+    :param fluent_map: ordered list of possible fluents for the problem
+    :return: dict of fluent -> int
+    """
+    return {fluent: idx for idx, fluent in enumerate(fluent_map)}
+
+
+def fluents_to_mask(fluents: list, index: dict) -> int:
+    """ encode a list of fluents as an integer bitset
+
+    :param fluents: list of fluents
+    :param index: dict of fluent -> bit number as returned by fluent_index
+    :return: int with the bit of each fluent set
+    """
+    mask = 0
+    for fluent in fluents:
+        mask |= 1 << index[fluent]
+    return mask
+
+
+def mask_bits(mask: int) -> list:
+    """ return the numbers of the set bits of mask in increasing order """
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low.bit_length() - 1)
+        mask ^= low
+    return bits
+
+
+def state_to_mask(state: str) -> int:
+    """ convert a T/F state string to an integer bitset
+
+    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents
+    :return: int where bit i is set if state[i] is 'T'
+    """
+    if not state:
+        return 0
+    return int(state[::-1].translate(_TF_TO_BITS), 2)
+
+
+def mask_to_state(mask: int, num_fluents: int) -> str:
+    """ convert an integer bitset back to a T/F state string
+
+    :param mask: int bitset as returned by state_to_mask
+    :param num_fluents: length of the state string
+    :return: str eg. "TFFTFT"
+    """
+    if not num_fluents:
+        return ""
+    return format(mask, "0{}b".format(num_fluents))[::-1].translate(_BITS_TO_TF)
+
+
+def action_masks(action, index: dict) -> tuple:
+    """ encode the preconditions and effects of a ground action as bitsets
+
+    :param action: Action object
+    :param index: dict of fluent -> bit number as returned by fluent_index
+    :return: tuple of int (precond_pos, precond_neg, effect_add, effect_rem)
+    """
+    return (fluents_to_mask(action.precond_pos, index),
+            fluents_to_mask(action.precond_neg, index),
+            fluents_to_mask(action.effect_add, index),
+            fluents_to_mask(action.effect_rem, index))
+
+
+class ActionIndex():
+    """ index of ground actions by precondition for fast applicability tests
+
+    Each action is filed under one of its positive precondition fluents, the
+    one required by the fewest actions, so enumerating the applicable actions
+    of a state only visits the actions filed under the fluents that are true
+    in it.  Actions with the same positive preconditions share a bucket and
+    are tested together.
+
+    :param actions: list of Action objects
+    :param masks: dict of Action -> tuple of int as returned by action_masks
+    """
+
+    def __init__(self, actions: list, masks: dict):
+        self.actions = actions
+        users = {}
+        for action in actions:
+            precond_pos = masks[action][0]
+            for bit in mask_bits(precond_pos):
+                users[bit] = users.get(bit, 0) + 1
+
+        # buckets: trigger bit -> {precond_pos mask -> [(position, precond_neg)]}
+        self.buckets = {}
+        self.unconditional = []
+        for position, action in enumerate(actions):
+            precond_pos, precond_neg, _, _ = masks[action]
+            if not precond_pos:
+                self.unconditional.append((position, precond_neg))
+                continue
+            trigger = min(mask_bits(precond_pos), key=lambda bit: (users[bit], bit))
+            by_precond = self.buckets.setdefault(1 << trigger, {})
+            by_precond.setdefault(precond_pos, []).append((position, precond_neg))
+        self.trigger_mask = 0
+        for trigger in self.buckets:
+            self.trigger_mask |= trigger
+
+    def applicable(self, mask: int) -> list:
+        """ return the actions applicable in a state
+
+        :param mask: int bitset of the state as returned by state_to_mask
+        :return: list of Action objects in the order of the indexed actions
+        """
+        positions = [position for position, precond_neg in self.unconditional
+                     if not mask & precond_neg]
+        triggers = mask & self.trigger_mask
+        while triggers:
+            trigger = triggers & -triggers
+            triggers ^= trigger
+            for precond_pos, entries in self.buckets[trigger].items():
+                if mask & precond_pos == precond_pos:
+                    positions.extend(position for position, precond_neg in entries
+                                     if not mask & precond_neg)
+        positions.sort()
+        return [self.actions[position] for position in positions]
@@ -1,15 +1,18 @@
-from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (
     Node, Problem,
 )
 from aimacode.utils import expr
 from lp_utils import (
-    FluentState, encode_state, decode_state,
+    FluentState, encode_state, fluent_index, fluents_to_mask,
+    state_to_mask, mask_to_state, mask_bits, action_masks, ActionIndex,
 )
 from my_planning_graph import PlanningGraph
-
-from functools import lru_cache
+from numpy_planning_graph import NumpyPlanningGraph
+from relaxed_heuristics import (
+    relaxed_action_table, relaxed_costs, goal_cost, relaxed_plan,
+)
+from heuristic_cache import cached_heuristic
 
 
 class AirCargoProblem(Problem):
@@ -34,6 +37,16 @@ class AirCargoProblem(Problem):
         self.planes = planes
         self.airports = airports
         self.actions_list = self.get_actions()
+        # states are T/F strings at the Problem interface, but actions,
+        # results and goal tests are computed on integer bitsets with one bit
+        # per fluent of state_map
+        self.fluent_index = fluent_index(self.state_map)
+        self.action_masks = {action: action_masks(action, self.fluent_index)
+                             for action in self.actions_list}
+        self.goal_mask = fluents_to_mask(self.goal, self.fluent_index)
+        self.action_index = ActionIndex(self.actions_list, self.action_masks)
+        self.goal_bits = mask_bits(self.goal_mask)
+        self.relaxed_actions = relaxed_action_table(self.actions_list, self.action_masks)
 
     def get_actions(self):
         """
@@ -121,20 +134,7 @@ class AirCargoProblem(Problem):
             e.g. 'FTTTFF'
         :return: list of Action objects
         """
-        possible_actions = []
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in kb.clauses:
-                    is_possible = False
-            for clause in action.precond_neg:
-                if clause in kb.clauses:
-                    is_possible = False
-            if is_possible:
-                possible_actions.append(action)
-        return possible_actions
+        return self.action_index.applicable(state_to_mask(state))
 
     def result(self, state: str, action: Action):
         """ Return the state that results from executing the given
@@ -145,21 +145,13 @@ class AirCargoProblem(Problem):
         :param action: Action applied
         :return: resulting state after action
         """
-        new_state = FluentState([], [])
-        old_state = decode_state(state, self.state_map)
-        for fluent in old_state.pos:
-            if fluent not in action.effect_rem:
-                new_state.pos.append(fluent)
-        for fluent in action.effect_add:
-            if fluent not in new_state.pos:
-                new_state.pos.append(fluent)
-        for fluent in old_state.neg:
-            if fluent not in action.effect_add:
-                new_state.neg.append(fluent)
-        for fluent in action.effect_rem:
-            if fluent not in new_state.neg:
-                new_state.neg.append(fluent)
-        return encode_state(new_state, self.state_map)
+        masks = self.action_masks.get(action)
+        if masks is None:
+            # an equivalent action built outside of get_actions()
+            masks = action_masks(action, self.fluent_index)
+        _, _, effect_add, effect_rem = masks
+        new_mask = (state_to_mask(state) & ~effect_rem) | effect_add
+        return mask_to_state(new_mask, len(self.state_map))
 
     def goal_test(self, state: str) -> bool:
         """ Test the state to see if goal is reached
@@ -167,19 +159,22 @@ class AirCargoProblem(Problem):
         :param state: str representing state
         :return: bool
         """
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                return False
-        return True
+        return state_to_mask(state) & self.goal_mask == self.goal_mask
+
+    def goal_count(self, state: str) -> int:
+        """ Count the goal fluents that are not satisfied in the state
+
+        :param state: str representing state
+        :return: int
+        """
+        return bin(self.goal_mask & ~state_to_mask(state)).count("1")
 
     def h_1(self, node: Node):
         # note that this is not a true heuristic
         h_const = 1
         return h_const
 
-    @lru_cache(maxsize=8192)
+    @cached_heuristic
     def h_pg_levelsum(self, node: Node):
         """This heuristic uses a planning graph representation of the problem
         state space to estimate the sum of all actions that must be carried
@@ -191,21 +186,77 @@ class AirCargoProblem(Problem):
         pg_levelsum = pg.h_levelsum()
         return pg_levelsum
 
-    @lru_cache(maxsize=8192)
+    @cached_heuristic
+    def h_pg_levelsum_numpy(self, node: Node):
+        """The h_pg_levelsum heuristic computed with the vectorized planning
+        graph engine, which gives the same values much faster.
+        """
+        pg = NumpyPlanningGraph(self, node.state, mutexes=False)
+        return pg.h_levelsum()
+
+    @cached_heuristic
+    def h_max(self, node: Node):
+        """The delete-relaxation heuristic h_max: the largest relaxed cost of
+        any goal, where the cost of an action's preconditions is the cost of
+        the most expensive one (admissible).
+        """
+        costs, _ = relaxed_costs(state_to_mask(node.state), len(self.state_map),
+                                 self.relaxed_actions, max)
+        return goal_cost(costs, self.goal_bits, max)
+
+    @cached_heuristic
+    def h_add(self, node: Node):
+        """The delete-relaxation heuristic h_add: the sum of the relaxed costs
+        of the goals, where the cost of an action's preconditions is the sum
+        of their costs (not admissible, but better informed than h_max).
+        """
+        costs, _ = relaxed_costs(state_to_mask(node.state), len(self.state_map),
+                                 self.relaxed_actions, sum)
+        return goal_cost(costs, self.goal_bits, sum)
+
+    @cached_heuristic
+    def h_ff(self, node: Node):
+        """The FF heuristic: the number of actions in a relaxed plan extracted
+        through the cheapest (h_add) achievers of the goals and their
+        preconditions (not admissible).
+        """
+        plan, _ = self.relaxed_plan(node.state)
+        return float('inf') if plan is None else len(plan)
+
+    def relaxed_plan(self, state: str):
+        """ Extract an FF relaxed plan from the state
+
+        :param state: str representing state
+        :return: (set of positions in actions_list, bitset of the first-layer
+            fluents of the plan), or (None, 0) if the goal is unreachable
+        """
+        mask = state_to_mask(state)
+        costs, supporters = relaxed_costs(mask, len(self.state_map),
+                                          self.relaxed_actions, sum)
+        return relaxed_plan(mask, self.goal_bits, costs, supporters,
+                            self.relaxed_actions)
+
+    def helpful_actions(self, state: str) -> list:
+        """ Return FF's helpful actions: the applicable actions that achieve
+        a fluent needed by the first layer of the relaxed plan
+
+        :param state: str representing state
+        :return: list of Action objects
+        """
+        _, first_layer = self.relaxed_plan(state)
+        return [action for action in self.actions(state)
+                if self.action_masks[action][2] & first_layer]
+
+    @cached_heuristic
     def h_ignore_preconditions(self, node: Node):
         """This heuristic estimates the minimum number of actions that must be
         carried out from the current state in order to satisfy all of the goal
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
-        # TODO implement (see Russell-Norvig Ed-3 10.2.3  or Russell-Norvig Ed-2 11.2)
-        count = 0
-        kb = PropKB()
-        kb.tell(decode_state(node.state, self.state_map).pos_sentence())
-        for g in self.goal:
-            if g not in kb.clauses:
-                count += 1
-        return count
+        # every action adds a single fluent, so without preconditions each
+        # unsatisfied goal takes exactly one action
+        return self.goal_count(node.state)
 
 
 def air_cargo_p1() -> AirCargoProblem:
@@ -1,8 +1,13 @@
+import weakref
+
 from aimacode.planning import Action
 from aimacode.search import Problem
 from aimacode.utils import expr
 from lp_utils import decode_state
 
+# state-independent planning graph data per problem, released with the problem
+_STATIC_DATA = weakref.WeakKeyDictionary()
+
 
 class PgNode():
     """Base class for planning graph nodes.
@@ -183,6 +188,22 @@ class PgNode_a(PgNode):
         return self.__hash
 
 
+class PlanningGraphStatic():
+    """State-independent data shared by all the planning graphs of a problem
+
+    Instance variables:
+        all_actions: list of the problem's ground actions followed by the no-op actions
+        precond_keys: list of the (symbol, is_pos) precondition literals of each action
+        static_mutex: list of int bitmasks, bit j of entry i set if actions i and j
+            are mutex at every level (serial planning, inconsistent effects or interference)
+    """
+
+    def __init__(self, all_actions, precond_keys, static_mutex):
+        self.all_actions = all_actions
+        self.precond_keys = precond_keys
+        self.static_mutex = static_mutex
+
+
 def mutexify(node1: PgNode, node2: PgNode):
     """ adds sibling nodes to each other's mutual exclusion (mutex) set. These should be sibling nodes!
 
@@ -218,11 +239,41 @@ class PlanningGraph():
         self.problem = problem
         self.fs = decode_state(state, problem.state_map)
         self.serial = serial_planning
-        self.all_actions = self.problem.actions_list + self.noop_actions(self.problem.state_map)
+        self.static = self.static_data()
+        self.all_actions = self.static.all_actions
+        self.action_position = {}
         self.s_levels = []
         self.a_levels = []
         self.create_graph()
 
+    def static_data(self) -> PlanningGraphStatic:
+        """ return the state-independent data of the problem, computing it for the first graph
+
+        The no-op actions, the precondition literals of every action and the
+        static action mutexes (serialization, inconsistent effects and
+        interference only depend on the actions) are shared by every graph
+        built for the same problem, so only level expansion and the competing
+        needs and inconsistent support mutexes are computed per state.
+
+        :return: PlanningGraphStatic
+        """
+        by_mode = _STATIC_DATA.setdefault(self.problem, {})
+        if self.serial not in by_mode:
+            all_actions = self.problem.actions_list + self.noop_actions(self.problem.state_map)
+            nodes = [PgNode_a(action) for action in all_actions]
+            precond_keys = [[(s.symbol, s.is_pos) for s in node.prenodes] for node in nodes]
+            static_mutex = [0] * len(nodes)
+            for i, n1 in enumerate(nodes[:-1]):
+                for j in range(i + 1, len(nodes)):
+                    n2 = nodes[j]
+                    if (self.serialize_actions(n1, n2) or
+                            self.inconsistent_effects_mutex(n1, n2) or
+                            self.interference_mutex(n1, n2)):
+                        static_mutex[i] |= 1 << j
+                        static_mutex[j] |= 1 << i
+            by_mode[self.serial] = PlanningGraphStatic(all_actions, precond_keys, static_mutex)
+        return by_mode[self.serial]
+
     def noop_actions(self, literal_list):
         """create persistent action for each possible fluent
 
@@ -239,7 +290,7 @@ class PlanningGraph():
         negative precondition and remove the literal expression as an effect in
         the output.
 
-        This function should only be called by the class constructor.
+        This function is only called once per problem, by static_data().
 
         :param literal_list:
         :return: list of Action
@@ -311,16 +362,20 @@ class PlanningGraph():
         #   to see if a proposed PgNode_a has prenodes that are a subset of the previous S level.  Once an
         #   action node is added, it MUST be connected to the S node instances in the appropriate s_level set.
         self.a_levels.append(set())
-        # Iterate throught possible actions for the problem
-        for action in self.all_actions:
-            # create a node to add to the action level
-            node_a = PgNode_a(action)
-            if node_a.prenodes.issubset(self.s_levels[level]):
+        s_nodes = {(node_s.symbol, node_s.is_pos): node_s for node_s in self.s_levels[level]}
+        # Iterate throught possible actions for the problem, creating nodes
+        # only for the actions whose preconditions are all in the S level
+        for position, action in enumerate(self.all_actions):
+            precond_keys = self.static.precond_keys[position]
+            if all(key in s_nodes for key in precond_keys):
+                node_a = PgNode_a(action)
+                self.action_position[node_a] = position
                 self.a_levels[level].add(node_a)
-        # add
-        for node_s in node_a.prenodes:
-            node_s.children.add(node_a)
-            node_a.parents.add(node_s)
+                # connect the node to the S level nodes of its preconditions
+                for key in precond_keys:
+                    node_s = s_nodes[key]
+                    node_s.children.add(node_a)
+                    node_a.parents.add(node_s)
 
 
     def add_literal_level(self, level):
@@ -341,9 +396,15 @@ class PlanningGraph():
         #   all of the new S nodes as children of all the A nodes that could produce them, and likewise add the A nodes to the
         #   parent sets of the S nodes
         self.s_levels.append(set())
+        s_nodes = {}
         for node_a in self.a_levels[level-1]:
-            for node_s in node_a.effnodes: # node_a.effnodes denote the result of action which is a literal
-                self.s_levels[level].add(node_s)
+            for effect in node_a.effnodes: # node_a.effnodes denote the result of action which is a literal
+                # every achiever is connected to the single node of the literal in this level
+                key = (effect.symbol, effect.is_pos)
+                node_s = s_nodes.get(key)
+                if node_s is None:
+                    node_s = s_nodes[key] = effect
+                    self.s_levels[level].add(node_s)
                 node_a.children.add(node_s)
                 node_s.parents.add(node_a)
 
@@ -363,12 +424,14 @@ class PlanningGraph():
             mutex set in each PgNode_a in the set is appropriately updated
         """
         nodelist = list(nodeset)
+        positions = [self.action_position[node] for node in nodelist]
+        static_mutex = self.static.static_mutex
         for i, n1 in enumerate(nodelist[:-1]):
-            for n2 in nodelist[i + 1:]:
-                if (self.serialize_actions(n1, n2) or
-                        self.inconsistent_effects_mutex(n1, n2) or
-                        self.interference_mutex(n1, n2) or
-                        self.competing_needs_mutex(n1, n2)):
+            mutex_mask = static_mutex[positions[i]]
+            for j in range(i + 1, len(nodelist)):
+                n2 = nodelist[j]
+                # serialization, inconsistent effects and interference are static
+                if mutex_mask >> positions[j] & 1 or self.competing_needs_mutex(n1, n2):
                     mutexify(n1, n2)
 
     def serialize_actions(self, node_a1: PgNode_a, node_a2: PgNode_a) -> bool:
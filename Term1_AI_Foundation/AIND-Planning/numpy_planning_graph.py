@@ -0,0 +1,210 @@
+"""Planning graph engine on boolean NumPy arrays.
+
+Literals are numbered like the state encoding: literal i < n is the positive
+fluent state_map[i] and literal n + i its negation.  Actions are numbered
+like problem.actions_list, followed by the positive and the negative no-op
+action of every fluent.  Each S level is a boolean vector over the 2n
+literals, each A level a boolean vector over the actions, and the mutex
+relations of a level are boolean matrices, so building a level is a handful
+of matrix products instead of nested loops over node objects.
+
+The matrices that only depend on the problem (preconditions, effects and the
+static action mutexes: serialization, inconsistent effects and interference)
+are built once per problem and shared by every graph.
+
+Like `my_planning_graph.PlanningGraph`, actions are added to a level when
+their preconditions are present (ignoring mutexes) and the graph is leveled
+when two consecutive S levels contain the same literals, so `h_levelsum()`
+returns the same values.
+"""
+import weakref
+
+import numpy as np
+
+from aimacode.search import Problem
+from lp_utils import fluent_index
+
+# static matrices per problem, released with the problem
+_GRAPH_MATRICES = weakref.WeakKeyDictionary()
+
+
+class PlanningGraphMatrices():
+    """Precondition, effect and static mutex matrices of a planning problem
+
+    :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+    :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+    Instance variables calculated:
+        num_fluents: int, n
+        num_actions: int, the ground actions plus 2n no-op actions
+        precond: float32 array (actions x literals), 1 where the literal is a precondition
+        precond_count: float32 array (actions), number of preconditions of each action
+        effect: float32 array (actions x literals), 1 where the literal is an effect
+        negation: bool array (literals x literals), True for a literal and its negation
+        static_mutex: bool array (actions x actions), True for actions that are mutex
+            at every level (serial planning, inconsistent effects or interference)
+    """
+
+    def __init__(self, problem: Problem, serial_planning=True):
+        n = len(problem.state_map)
+        index = fluent_index(problem.state_map)
+        actions = problem.actions_list
+        self.num_fluents = n
+        self.num_actions = len(actions) + 2 * n
+        self.literal_index = index
+
+        precond = np.zeros((self.num_actions, 2 * n), dtype=bool)
+        effect = np.zeros((self.num_actions, 2 * n), dtype=bool)
+        for row, action in enumerate(actions):
+            for fluent in action.precond_pos:
+                precond[row, index[fluent]] = True
+            for fluent in action.precond_neg:
+                precond[row, n + index[fluent]] = True
+            for fluent in action.effect_add:
+                effect[row, index[fluent]] = True
+            for fluent in action.effect_rem:
+                effect[row, n + index[fluent]] = True
+        # no-op actions require and produce the same literal
+        noops = np.arange(len(actions), self.num_actions)
+        precond[noops, np.arange(2 * n)] = True
+        effect[noops, np.arange(2 * n)] = True
+        persistent = np.zeros(self.num_actions, dtype=bool)
+        persistent[noops] = True
+
+        self.negation = np.zeros((2 * n, 2 * n), dtype=bool)
+        self.negation[np.arange(n), np.arange(n) + n] = True
+        self.negation[np.arange(n) + n, np.arange(n)] = True
+
+        self.precond = precond.astype(np.float32)
+        self.precond_count = self.precond.sum(axis=1)
+        self.effect = effect.astype(np.float32)
+
+        # effect[a, negation(l)]: the negations of the effects of each action
+        negated_effect = self.effect.dot(self.negation.astype(np.float32))
+        inconsistent = negated_effect.dot(self.effect.T) > 0
+        interference = negated_effect.dot(self.precond.T) > 0
+        static_mutex = inconsistent | interference | interference.T
+        if serial_planning:
+            static_mutex |= np.outer(~persistent, ~persistent)
+        np.fill_diagonal(static_mutex, False)
+        self.static_mutex = static_mutex
+
+
+def graph_matrices(problem: Problem, serial_planning=True) -> PlanningGraphMatrices:
+    """ return the shared static matrices of a problem, building them on first use
+
+    :param problem: PlanningProblem
+    :param serial_planning: bool
+    :return: PlanningGraphMatrices
+    """
+    by_mode = _GRAPH_MATRICES.setdefault(problem, {})
+    if serial_planning not in by_mode:
+        by_mode[serial_planning] = PlanningGraphMatrices(problem, serial_planning)
+    return by_mode[serial_planning]
+
+
+class NumpyPlanningGraph():
+    """
+    A planning graph as described in chapter 10 of the AIMA text, with the
+    levels and mutex relations stored as boolean arrays.
+    """
+
+    def __init__(self, problem: Problem, state: str, serial_planning=True, mutexes=True):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        :param state: str (will be in form TFTTFF... representing fluent states)
+        :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+        :param mutexes: bool (whether or not to compute the mutex relations, which h_levelsum does not need)
+        Instance variable calculated:
+            s_levels: list of bool arrays over the literals, one per S level
+            a_levels: list of bool arrays over the actions, one per A level
+            s_mutex: list of bool matrices (literals x literals), one per S level
+            a_mutex: list of bool matrices (actions x actions), one per A level
+        """
+        self.problem = problem
+        self.matrices = graph_matrices(problem, serial_planning)
+        self.mutexes = mutexes
+        self.s_levels = []
+        self.a_levels = []
+        self.s_mutex = []
+        self.a_mutex = []
+        self.create_graph(state)
+
+    def create_graph(self, state: str):
+        """ build the graph from S0 until two consecutive S levels contain the same literals
+
+        :param state: str of T/F
+        :return:
+            fills s_levels[] and a_levels[] (and the mutex lists if requested)
+        """
+        m = self.matrices
+        positive = np.frombuffer(state.encode("ascii"), dtype=np.uint8) == ord("T")
+        s_level = np.concatenate([positive, ~positive])
+        self.s_levels.append(s_level)
+        if self.mutexes:
+            # no mutexes at the first level except between a literal and its negation
+            self.s_mutex.append(m.negation & np.outer(s_level, s_level))
+
+        while True:
+            missing = m.precond.dot(~s_level)
+            a_level = missing == 0
+            self.a_levels.append(a_level)
+            next_level = m.effect.T.dot(a_level) > 0
+            if self.mutexes:
+                self.update_mutexes(a_level, next_level)
+            self.s_levels.append(next_level)
+            if np.array_equal(next_level, s_level):
+                break
+            s_level = next_level
+
+    def update_mutexes(self, a_level, next_level):
+        """ compute the mutexes of an A level and of the S level that follows it
+
+        Actions are mutex if they are statically mutex or have competing
+        needs (mutex preconditions); literals are mutex if they are negations
+        of each other or have inconsistent support (every pair of achievers
+        is mutex).  As in `my_planning_graph.PlanningGraph`, an action is
+        never mutex with itself, even if its own preconditions are mutex.
+
+        :param a_level: bool array over the actions
+        :param next_level: bool array over the literals of the next S level
+        :return:
+            appends to a_mutex[] and s_mutex[]
+        """
+        m = self.matrices
+        s_mutex = self.s_mutex[-1].astype(np.float32)
+        competing = m.precond.dot(s_mutex).dot(m.precond.T) > 0
+        active = np.outer(a_level, a_level)
+        a_mutex = (m.static_mutex | competing) & active
+        np.fill_diagonal(a_mutex, False)
+        self.a_mutex.append(a_mutex)
+
+        achievers = m.effect * a_level[:, np.newaxis]
+        compatible = (active & ~a_mutex).astype(np.float32)
+        supported = achievers.T.dot(compatible).dot(achievers) > 0
+        s_mutex = (m.negation | ~supported) & np.outer(next_level, next_level)
+        np.fill_diagonal(s_mutex, False)
+        self.s_mutex.append(s_mutex)
+
+    def h_levelsum(self) -> int:
+        """The sum of the level costs of the individual goals (admissible if goals independent)
+
+        :return: int
+        """
+        levels = np.array(self.s_levels)
+        goals = [self.matrices.literal_index[goal] for goal in self.problem.goal]
+        reached = levels[:, goals]
+        # the first level where each goal appears, or 0 if it never does
+        costs = np.where(reached.any(axis=0), reached.argmax(axis=0), 0)
+        return int(costs.sum())
+
+    def level_cost(self, goal) -> int:
+        """ the first S level that contains the goal literal, or 0 if none does
+
+        :param goal: expr of a positive fluent
+        :return: int
+        """
+        column = self.matrices.literal_index[goal]
+        for level, s_level in enumerate(self.s_levels):
+            if s_level[column]:
+                return level
+        return 0
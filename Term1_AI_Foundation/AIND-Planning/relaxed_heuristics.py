@@ -0,0 +1,103 @@
+"""Delete-relaxation heuristics computed on bitset states.
+
+The delete relaxation ignores the delete effects (and negative
+preconditions) of every action, so the set of reachable fluents only grows
+and the cost of reaching each fluent from a state is found with a fixpoint
+iteration over the ground actions:
+
+    cost(f) = 0                                       if f holds in the state
+    cost(f) = min over actions a adding f of 1 + combine(cost(p) for p in pre(a))
+
+With combine = max the goal cost is h_max (admissible), with combine = sum it
+is h_add (more informed, not admissible).  h_FF extracts a relaxed plan by
+following the cheapest achiever of every goal and precondition back to the
+state and counts its actions; the applicable actions that achieve a fluent
+of the first layer of that plan are FF's "helpful actions".
+"""
+
+from lp_utils import mask_bits
+
+infinity = float('inf')
+
+
+def relaxed_action_table(actions: list, masks: dict) -> list:
+    """ precompute the relaxed view of the ground actions
+
+    :param actions: list of Action objects
+    :param masks: dict of Action -> tuple of int as returned by lp_utils.action_masks
+    :return: list of tuples (precond_pos mask, list of precondition bits, effect_add mask, list of add bits)
+    """
+    table = []
+    for action in actions:
+        precond_pos, _, effect_add, _ = masks[action]
+        table.append((precond_pos, mask_bits(precond_pos), effect_add, mask_bits(effect_add)))
+    return table
+
+
+def relaxed_costs(state_mask: int, num_fluents: int, table: list, combine=max) -> tuple:
+    """ compute the relaxed cost of every fluent from a state
+
+    :param state_mask: int bitset of the state
+    :param num_fluents: number of fluents in the state encoding
+    :param table: list as returned by relaxed_action_table
+    :param combine: function aggregating precondition costs (max for h_max, sum for h_add)
+    :return: (costs, supporters) lists indexed by fluent; supporters hold the
+        position in table of the cheapest achiever (None for fluents of the state
+        and unreachable fluents, whose cost is infinity)
+    """
+    costs = [0 if state_mask >> bit & 1 else infinity for bit in range(num_fluents)]
+    supporters = [None] * num_fluents
+    reached = state_mask
+    changed = True
+    while changed:
+        changed = False
+        for row, (precond_mask, precond_bits, _, add_bits) in enumerate(table):
+            if reached & precond_mask != precond_mask:
+                continue
+            cost = 1 + (combine(costs[bit] for bit in precond_bits) if precond_bits else 0)
+            for bit in add_bits:
+                if cost < costs[bit]:
+                    costs[bit] = cost
+                    supporters[bit] = row
+                    reached |= 1 << bit
+                    changed = True
+    return costs, supporters
+
+
+def goal_cost(costs: list, goal_bits: list, combine=max):
+    """ aggregate the relaxed costs of the goal fluents
+
+    :return: int, or infinity if a goal is unreachable
+    """
+    if not goal_bits:
+        return 0
+    return combine(costs[bit] for bit in goal_bits)
+
+
+def relaxed_plan(state_mask: int, goal_bits: list, costs: list, supporters: list, table: list):
+    """ extract a relaxed plan by regressing from the goals through the cheapest achievers
+
+    :return: (plan, first_layer) where plan is the set of positions in table
+        of the plan actions and first_layer the bitset of the plan's fluents
+        that the plan achieves with a single action; or (None, 0) if a goal is
+        unreachable
+    """
+    plan = set()
+    first_layer = 0
+    seen = 0
+    stack = list(goal_bits)
+    while stack:
+        bit = stack.pop()
+        if (state_mask | seen) >> bit & 1:
+            continue
+        seen |= 1 << bit
+        row = supporters[bit]
+        if row is None:
+            return None, 0
+        if costs[bit] == 1:
+            first_layer |= 1 << bit
+        if row not in plan:
+            plan.add(row)
+            stack.extend(table[row][1])
+    return plan, first_layer
+
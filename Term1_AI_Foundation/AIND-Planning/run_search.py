@@ -1,11 +1,22 @@
 import argparse
+import csv
+import json
+import multiprocessing
+from multiprocessing.connection import wait
 from timeit import default_timer as timer
+try:
+    import resource
+except ImportError:  # memory limits are not available on Windows
+    resource = None
 from aimacode.search import InstrumentedProblem
 from aimacode.search import (breadth_first_search, astar_search,
     breadth_first_tree_search, depth_first_graph_search, uniform_cost_search,
     greedy_best_first_graph_search, depth_limited_search,
     recursive_best_first_search)
 from my_air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3
+from heuristic_cache import (
+    DEFAULT_MAXSIZE, POLICIES, configure_heuristic_cache, cache_report,
+)
 
 PROBLEM_CHOICE_MSG = """
 Select from the following list of air cargo problems. You may choose more than
@@ -36,6 +47,11 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_1'],
             ['astar_search', astar_search, 'h_ignore_preconditions'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
+            ['astar_search', astar_search, 'h_pg_levelsum_numpy'],
+            ['astar_search', astar_search, 'h_max'],
+            ['astar_search', astar_search, 'h_add'],
+            ['astar_search', astar_search, 'h_ff'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_ff'],
             ]
 
 
@@ -61,6 +77,9 @@ def run_search(problem, search_function, parameter=None):
     print("\nExpansions   Goal Tests   New Nodes")
     print("{}\n".format(ip))
     show_solution(node, end - start)
+    report = cache_report(problem)
+    if report:
+        print("\n" + report)
     print()
 
 
@@ -85,7 +104,7 @@ def manual():
                                                " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, cache_size=DEFAULT_MAXSIZE, cache_policy="lru", cache_memory=None):
 
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
@@ -97,10 +116,154 @@ def main(p_choices, s_choices):
             print("\nSolving {} using {}{}...".format(pname, sname, hstring))
 
             _p = p()
+            configure_heuristic_cache(_p, cache_size, cache_policy, cache_memory)
             _h = None if not h else getattr(_p, h)
             run_search(_p, s, _h)
 
 
+BATCH_FIELDS = ["problem", "search", "heuristic", "status", "expansions",
+                "goal_tests", "new_nodes", "plan_length", "time"]
+
+
+def solve(p_choice, s_choice, cache_size=DEFAULT_MAXSIZE, cache_policy="lru", cache_memory=None):
+    """ solve one problem with one search and return a dict of BATCH_FIELDS """
+    pname, p = PROBLEMS[p_choice-1]
+    sname, s, h = SEARCHES[s_choice-1]
+    _p = p()
+    configure_heuristic_cache(_p, cache_size, cache_policy, cache_memory)
+    ip = PrintableProblem(_p)
+    start = timer()
+    node = s(ip, getattr(_p, h)) if h else s(ip)
+    elapsed = timer() - start
+    # depth_limited_search returns 'cutoff' or None when it finds no plan
+    solved = hasattr(node, "solution")
+    return dict(problem=pname, search=sname, heuristic=h,
+                status="solved" if solved else "no plan",
+                expansions=ip.succs, goal_tests=ip.goal_tests, new_nodes=ip.states,
+                plan_length=len(node.solution()) if solved else None, time=elapsed)
+
+
+def _batch_worker(conn, memory_limit, args):
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    try:
+        result = solve(*args)
+    except MemoryError:
+        result = None
+    conn.send(result)
+    conn.close()
+
+
+class BatchWriter():
+    """ stream batch results to a CSV file, or JSON lines for any other extension """
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.csv = None
+        if path.lower().endswith(".csv"):
+            self.csv = csv.DictWriter(self.file, BATCH_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, result):
+        if self.csv is not None:
+            self.csv.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run_batch(p_choices, s_choices, processes=None, timeout=None, memory_limit=None,
+              output=None, cache_size=DEFAULT_MAXSIZE, cache_policy="lru", cache_memory=None):
+    """ solve every (problem, search) combination in parallel worker processes
+
+    Each combination runs in its own process, so a run that exceeds timeout
+    seconds is terminated and one that exceeds memory_limit bytes of address
+    space fails on its own without stopping the batch.  Results are written to
+    output as they finish and summarized in a table at the end.
+
+    :param processes: int number of combinations run at once (default: number of CPUs)
+    :param timeout: float seconds per combination, None for no limit
+    :param memory_limit: int bytes per combination, None for no limit
+    :param output: str path of the CSV (.csv) or JSON lines (other extensions) file to write
+    :return: list of result dicts in the order of the combinations
+    """
+    jobs = [(int(p), int(s)) for p in p_choices for s in s_choices]
+    processes = processes or multiprocessing.cpu_count()
+    writer = BatchWriter(output) if output else None
+    results = {}
+    pending = list(reversed(jobs))
+    running = {}  # process sentinel -> (job, process, connection, start time)
+    try:
+        while pending or running:
+            while pending and len(running) < processes:
+                job = pending.pop()
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_batch_worker,
+                    args=(sender, memory_limit, job + (cache_size, cache_policy, cache_memory)))
+                process.start()
+                sender.close()
+                running[process.sentinel] = (job, process, receiver, timer())
+
+            wait_time = None
+            if timeout is not None:
+                wait_time = max(0, min(start + timeout for _, _, _, start in running.values()) - timer())
+            ready = wait(list(running) + [conn for _, _, conn, _ in running.values()], wait_time)
+
+            for sentinel, (job, process, conn, start) in list(running.items()):
+                status = None
+                if conn in ready or sentinel in ready:
+                    # a worker sends None when it runs out of memory, and
+                    # closes the pipe without sending anything if it crashes
+                    try:
+                        result = conn.recv()
+                        status = "memory" if result is None else result["status"]
+                    except EOFError:
+                        result, status = None, "error"
+                elif timeout is not None and timer() - start > timeout:
+                    process.terminate()
+                    result, status = None, "timeout"
+                if status is None:
+                    continue
+                process.join()
+                conn.close()
+                del running[sentinel]
+                if result is None:
+                    pname, sname, h = PROBLEMS[job[0]-1][0], SEARCHES[job[1]-1][0], SEARCHES[job[1]-1][2]
+                    result = dict.fromkeys(BATCH_FIELDS)
+                    result.update(problem=pname, search=sname, heuristic=h, status=status,
+                                  time=timer() - start)
+                results[job] = result
+                if writer is not None:
+                    writer.write(result)
+                print("{problem}: {search} {heuristic} -> {status} ({time:.2f}s)".format(**result))
+    finally:
+        for _, process, _, _ in running.values():
+            process.terminate()
+        if writer is not None:
+            writer.close()
+
+    ordered = [results[job] for job in jobs]
+    print()
+    print(batch_table(ordered))
+    return ordered
+
+
+def batch_table(results) -> str:
+    """ format batch results as a table with the run_search statistics """
+    lines = ["{:<22}{:<32}{:<24}{:^10}  {:^10}  {:^10}  {:^8}  {:^10}  {:<8}".format(
+        "Problem", "Search", "Heuristic", "Expansions", "Goal Tests", "New Nodes",
+        "Plan", "Seconds", "Status")]
+    for r in results:
+        counts = ["" if r[f] is None else r[f] for f in ("expansions", "goal_tests", "new_nodes", "plan_length")]
+        lines.append("{:<22}{:<32}{:<24}{:^10}  {:^10}  {:^10}  {:^8}  {:^10.2f}  {:<8}".format(
+            r["problem"], r["search"], r["heuristic"] or "-", *counts, r["time"], r["status"]))
+    return "\n".join(lines)
+
+
 def show_solution(node, elapsed_time):
     print("Plan length: {}  Time elapsed in seconds: {}".format(len(node.solution()), elapsed_time))
     for action in node.solution():
@@ -116,12 +279,36 @@ if __name__=="__main__":
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAXSIZE,
+                        help="Maximum number of states cached per heuristic, 0 to disable caching, -1 for no limit (default {}).".format(DEFAULT_MAXSIZE))
+    parser.add_argument('--cache-policy', choices=POLICIES, default="lru",
+                        help="Heuristic cache eviction policy (default lru).")
+    parser.add_argument('--cache-memory', type=float, default=None,
+                        help="Maximum approximate memory in MB per heuristic cache (default no limit).")
+    parser.add_argument('-b', '--batch', action="store_true",
+                        help="Solve the combinations in parallel worker processes and print a summary table.")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Number of combinations solved at once in batch mode (default: number of CPUs).")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="Seconds allowed per combination in batch mode (default no limit).")
+    parser.add_argument('--memory-limit', type=float, default=None,
+                        help="Memory in MB allowed per combination in batch mode (default no limit).")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Write batch results as they finish to this file: CSV for a .csv extension, JSON lines otherwise.")
     args = parser.parse_args()
+    cache_size = None if args.cache_size < 0 else args.cache_size
+    cache_memory = None if args.cache_memory is None else int(args.cache_memory * 2**20)
 
     if args.manual:
         manual()
+    elif args.problems and args.searches and args.batch:
+        memory_limit = None if args.memory_limit is None else int(args.memory_limit * 2**20)
+        run_batch(list(sorted(set(args.problems))), list(sorted(set((args.searches)))),
+                  args.processes, args.timeout, memory_limit, args.output,
+                  cache_size, args.cache_policy, cache_memory)
     elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))),
+             cache_size, args.cache_policy, cache_memory)
     else:
         print()
         parser.print_help()
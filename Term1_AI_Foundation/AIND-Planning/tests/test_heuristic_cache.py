@@ -0,0 +1,66 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.search import Node
+from heuristic_cache import HeuristicCache, configure_heuristic_cache, cache_report
+from my_air_cargo_problems import air_cargo_p1
+
+
+class TestHeuristicCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = HeuristicCache(maxsize=2, policy="lru")
+        cache.put("TF", 1)
+        cache.put("FT", 2)
+        self.assertEqual(cache.get("TF"), 1)
+        cache.put("TT", 3)
+        self.assertIsNone(cache.get("FT"))
+        self.assertEqual(cache.get("TF"), 1)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (2, 1, 1))
+
+    def test_fifo_eviction(self):
+        cache = HeuristicCache(maxsize=2, policy="fifo")
+        cache.put("TF", 1)
+        cache.put("FT", 2)
+        cache.get("TF")
+        cache.put("TT", 3)
+        self.assertIsNone(cache.get("TF"))
+        self.assertEqual(cache.get("FT"), 2)
+
+    def test_memory_bound(self):
+        size = HeuristicCache.entry_size("TF", 1)
+        cache = HeuristicCache(maxsize=None, max_memory=2 * size)
+        for state in ("TF", "FT", "TT"):
+            cache.put(state, 1)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.memory, 2 * size)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            HeuristicCache(policy="random")
+
+
+class TestCachedHeuristics(unittest.TestCase):
+
+    def setUp(self):
+        self.p = air_cargo_p1()
+
+    def test_cached_by_state(self):
+        self.assertEqual(self.p.h_add(Node(self.p.initial)), 6)
+        self.assertEqual(self.p.h_add(Node(self.p.initial)), 6)
+        cache = self.p.heuristic_caches['h_add']
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 1, 1))
+        self.assertIn("h_add", cache_report(self.p))
+
+    def test_disabled(self):
+        configure_heuristic_cache(self.p, maxsize=0)
+        self.p.h_max(Node(self.p.initial))
+        self.p.h_max(Node(self.p.initial))
+        cache = self.p.heuristic_caches['h_max']
+        self.assertEqual((cache.hits, len(cache)), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.planning import Action
+from aimacode.utils import expr
+from lp_utils import (
+    FluentState, encode_state, fluent_index, fluents_to_mask, state_to_mask,
+    mask_to_state, action_masks, ActionIndex,
+)
+
+
+class TestStateMasks(unittest.TestCase):
+
+    def setUp(self):
+        self.fluent_map = [expr('At(C1, SFO)'), expr('At(C1, JFK)'),
+                           expr('In(C1, P1)'), expr('At(P1, SFO)')]
+        self.index = fluent_index(self.fluent_map)
+
+    def test_state_mask_round_trip(self):
+        for state in ["TFFT", "FFFF", "TTTT", "FTFF"]:
+            mask = state_to_mask(state)
+            self.assertEqual(mask_to_state(mask, len(state)), state)
+
+    def test_mask_matches_encoding(self):
+        fs = FluentState([expr('At(C1, SFO)'), expr('At(P1, SFO)')],
+                         [expr('At(C1, JFK)'), expr('In(C1, P1)')])
+        state = encode_state(fs, self.fluent_map)
+        self.assertEqual(state, "TFFT")
+        self.assertEqual(state_to_mask(state), fluents_to_mask(fs.pos, self.index))
+        self.assertEqual(state_to_mask(state), 0b1001)
+
+
+class TestActionIndex(unittest.TestCase):
+
+    def setUp(self):
+        have, eaten = expr('Have(Cake)'), expr('Eaten(Cake)')
+        self.eat = Action(expr('Eat(Cake)'), [[have], []], [[eaten], [have]])
+        self.bake = Action(expr('Bake(Cake)'), [[], [have]], [[have], []])
+        self.actions = [self.eat, self.bake]
+        index = fluent_index([have, eaten])
+        masks = {action: action_masks(action, index) for action in self.actions}
+        self.index = ActionIndex(self.actions, masks)
+
+    def test_applicable(self):
+        self.assertEqual(self.index.applicable(state_to_mask("TF")), [self.eat])
+        self.assertEqual(self.index.applicable(state_to_mask("FT")), [self.bake])
+        self.assertEqual(self.index.applicable(state_to_mask("FF")), [self.bake])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -80,5 +80,23 @@ class TestAirCargoMethods(unittest.TestCase):
         n = Node(self.p1.initial)
         self.assertEqual(self.p1.h_ignore_preconditions(n),2)
 
+    def test_relaxed_heuristics(self):
+        n = Node(self.p1.initial)
+        self.assertEqual(self.p1.h_max(n), 2)
+        self.assertEqual(self.p1.h_add(n), 6)
+        self.assertEqual(self.p1.h_ff(n), 5)
+        helpful = [str(a) for a in self.p1.helpful_actions(self.p1.initial)]
+        self.assertIn('Load(C1, P1, SFO)', helpful)
+        self.assertNotIn('Load(C2, P2, JFK)', helpful)
+
+    def test_goal_count(self):
+        self.assertEqual(self.p1.goal_count(self.p1.initial), 2)
+        state = self.p1.initial
+        for name in ('Load(C1, P1, SFO)', 'Fly(P1, SFO, JFK)', 'Unload(C1, P1, JFK)'):
+            action = [a for a in self.p1.actions(state) if str(a) == name][0]
+            state = self.p1.result(state, action)
+        self.assertEqual(self.p1.goal_count(state), 1)
+        self.assertFalse(self.p1.goal_test(state))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -33,6 +33,20 @@ class TestPlanningGraphLevels(unittest.TestCase):
         self.assertEqual(len(self.pg.s_levels[2]), 4, len(self.pg.s_levels[2]))
 
 
+    def test_shared_static_data(self):
+        pg = PlanningGraph(self.p, self.p.initial)
+        self.assertIs(pg.static, self.pg.static)
+        self.assertIs(pg.all_actions, self.pg.all_actions)
+
+    def test_literal_parents(self):
+        # every achiever of a literal is connected to its single node in the level
+        for level in range(1, len(self.pg.s_levels)):
+            for node_s in self.pg.s_levels[level]:
+                achievers = {node_a for node_a in self.pg.a_levels[level - 1]
+                             if node_s in node_a.effnodes}
+                self.assertEqual(node_s.parents, achievers)
+
+
 class TestPlanningGraphMutex(unittest.TestCase):
     def setUp(self):
         self.p = have_cake()
@@ -0,0 +1,73 @@
+import os
+import sys
+
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1
+from my_planning_graph import PlanningGraph
+from numpy_planning_graph import NumpyPlanningGraph
+
+
+class TestNumpyPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.p = have_cake()
+        self.pg = NumpyPlanningGraph(self.p, self.p.initial)
+
+    def test_levels(self):
+        # literals are Have(Cake), Eaten(Cake) and their negations
+        self.assertEqual(self.pg.s_levels[0].tolist(), [True, False, False, True])
+        self.assertEqual(self.pg.s_levels[1].tolist(), [True, True, True, True])
+        self.assertEqual(int(self.pg.a_levels[0].sum()), 3)
+        self.assertEqual(int(self.pg.a_levels[1].sum()), 6)
+
+    def test_literal_mutex(self):
+        # Have(Cake) and Eaten(Cake) have inconsistent support in S1
+        self.assertTrue(self.pg.s_mutex[1][0, 1])
+        self.assertTrue(self.pg.s_mutex[1][0, 2])
+        self.assertFalse(self.pg.s_mutex[1][0, 3])
+
+    def test_levelsum_matches_planning_graph(self):
+        p = air_cargo_p1()
+        self.assertEqual(NumpyPlanningGraph(p, p.initial).h_levelsum(),
+                         PlanningGraph(p, p.initial).h_levelsum())
+
+
+    def test_mutexes_match_planning_graph(self):
+        p = air_cargo_p1()
+        n = len(p.state_map)
+        num_actions = len(p.actions_list)
+        state = p.initial
+        for action in p.actions(state)[:2]:
+            for s in (state, p.result(state, action)):
+                pg = PlanningGraph(p, s)
+                npg = NumpyPlanningGraph(p, s)
+                index = npg.matrices.literal_index
+
+                def literal(node):
+                    return index[node.symbol] + (0 if node.is_pos else n)
+
+                def action_index(node):
+                    # no-op actions come in (pos, neg) pairs per fluent in
+                    # PlanningGraph and as pos block, neg block in numpy
+                    position = pg.action_position[node]
+                    if position < num_actions:
+                        return position
+                    fluent, negative = divmod(position - num_actions, 2)
+                    return num_actions + fluent + (n if negative else 0)
+
+                self.assertEqual(len(pg.s_levels), len(npg.s_levels))
+                for level, nodes in enumerate(pg.s_levels):
+                    pairs = {(literal(a), literal(b)) for a in nodes for b in a.mutex}
+                    expected = set(zip(*npg.s_mutex[level].nonzero()))
+                    self.assertEqual(pairs, expected, "S{}".format(level))
+                for level, nodes in enumerate(pg.a_levels):
+                    pairs = {(action_index(a), action_index(b))
+                             for a in nodes for b in a.mutex}
+                    expected = set(zip(*npg.a_mutex[level].nonzero()))
+                    self.assertEqual(pairs, expected, "A{}".format(level))
+
+
+if __name__ == '__main__':
+    unittest.main()
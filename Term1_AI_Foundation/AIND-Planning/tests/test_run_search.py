@@ -0,0 +1,30 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import csv
+import tempfile
+import unittest
+from run_search import solve, run_batch
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_solve(self):
+        result = solve(1, 1)
+        self.assertEqual(result["status"], "solved")
+        self.assertEqual(result["plan_length"], 6)
+        self.assertEqual(result["expansions"], 43)
+
+    def test_run_batch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.csv")
+            results = run_batch([1], [1, 8], processes=2, timeout=60, output=path)
+            with open(path) as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([r["search"] for r in results], ["breadth_first_search", "astar_search"])
+        self.assertEqual(sorted(r["plan_length"] for r in rows), ["6", "6"])
+
+
+if __name__ == '__main__':
+    unittest.main()
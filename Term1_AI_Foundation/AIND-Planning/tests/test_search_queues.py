@@ -0,0 +1,106 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+import unittest
+from aimacode.search import (
+    InstrumentedProblem, Node, Problem, best_first_graph_search, node_state,
+    breadth_first_search, uniform_cost_search,
+)
+from aimacode.utils import FIFOQueue, PriorityQueue
+from my_air_cargo_problems import air_cargo_p1
+
+
+class LetterProblem(Problem):
+    """Collect the letters of the goal; states are the sorted letters held."""
+
+    def __init__(self):
+        super().__init__("", "xy")
+
+    def actions(self, state):
+        return [letter for letter in "axyz" if letter not in state]
+
+    def result(self, state, action):
+        return "".join(sorted(state + action))
+
+    def goal_test(self, state):
+        return self.goal_count(state) == 0
+
+    def goal_count(self, state):
+        return sum(letter not in state for letter in self.goal)
+
+
+class TestFIFOQueue(unittest.TestCase):
+
+    def test_order_and_membership(self):
+        q = FIFOQueue(key=node_state)
+        q.extend([Node("A"), Node("B"), Node("A")])
+        self.assertTrue(q.contains_key("B"))
+        self.assertIn(Node("A"), q)
+        self.assertEqual([q.pop().state for _ in range(2)], ["A", "B"])
+        self.assertFalse(q.contains_key("B"))
+        self.assertTrue(q.contains_key("A"))
+        self.assertEqual(q.pop().state, "A")
+        self.assertEqual(len(q), 0)
+        self.assertNotIn(Node("A"), q)
+
+    def test_breadth_first_search(self):
+        node = breadth_first_search(air_cargo_p1())
+        self.assertEqual(len(node.solution()), 6)
+
+
+class TestPriorityQueue(unittest.TestCase):
+
+    def test_replace(self):
+        q = PriorityQueue(min, lambda node: node.path_cost)
+        q.append(Node("A", path_cost=5))
+        q.append(Node("B", path_cost=3))
+        incumbent = q[Node("A")]
+        self.assertEqual(incumbent.path_cost, 5)
+        # del then append replaces the item even with a worse priority
+        del q[incumbent]
+        q.append(Node("A", path_cost=7))
+        self.assertEqual(len(q), 2)
+        self.assertEqual(q.pop().state, "B")
+        self.assertEqual(q.pop().path_cost, 7)
+        self.assertFalse(q)
+        self.assertNotIn(Node("A"), q)
+
+    def test_append_keeps_better_priority(self):
+        q = PriorityQueue(min, lambda node: node.path_cost)
+        q.append(Node("A", path_cost=3))
+        q.append(Node("A", path_cost=5))
+        self.assertEqual(q[Node("A")].path_cost, 3)
+        q.append(Node("A", path_cost=1))
+        self.assertEqual(q[Node("A")].path_cost, 1)
+        self.assertEqual(len(q), 1)
+        self.assertEqual(q.pop().path_cost, 1)
+        self.assertFalse(q)
+
+    def test_compaction(self):
+        q = PriorityQueue(min, lambda node: node.path_cost)
+        for cost in range(1000, 0, -1):
+            q.append(Node("A", path_cost=cost))
+        self.assertEqual(len(q), 1)
+        self.assertLessEqual(len(q.A), 33)
+        self.assertEqual(q.pop().path_cost, 1)
+        with self.assertRaises(IndexError):
+            q.pop()
+
+    def test_uniform_cost_search(self):
+        node = uniform_cost_search(air_cargo_p1())
+        self.assertEqual(len(node.solution()), 6)
+
+
+class TestBestFirstSearch(unittest.TestCase):
+
+    def test_goal_count_breaks_ties(self):
+        # every node has f = 0, so only the goal count orders the frontier
+        problem = InstrumentedProblem(LetterProblem())
+        node = best_first_graph_search(problem, lambda node: 0)
+        self.assertEqual(node.state, "xy")
+        self.assertEqual(problem.succs, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()